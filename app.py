@@ -10,12 +10,18 @@ from flask import (
     url_for,
     jsonify,
     abort)
-from flask import Response, flash
+from flask import Response, flash, stream_with_context
 from models import app, db, Animal, Institution, Specimen
+from auth.auth import auth0, requires_auth
+from pagination import keyset_page, page_args
+from search import search as full_text_search
+import ingest
+import partitions
 from flask_moment import Moment
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import joinedload
 from flask_migrate import Migrate
+from fsnd_db import PoolMonitor, ReplicaRouter
 import logging
 from logging import Formatter, FileHandler
 from flask_wtf import Form
@@ -23,6 +29,7 @@ from forms import *
 import json
 import dateutil.parser
 import babel
+import click
 import sys
 # ----------------------------------------------------------------------------#
 # App Config.
@@ -31,7 +38,11 @@ import sys
 current_role = None
 moment = Moment(app)
 app.config.from_object('config')
+# replica binds and pool options have to be in place before db.init_app
+ReplicaRouter(app)
+PoolMonitor(app)
 db.init_app(app)
+auth0.init_app(app)
 
 
 
@@ -55,16 +66,35 @@ def index():
 
 # TODO update endpoints
 
+#  Search
+#  ----------------------------------------------------------------
+@app.route('/search')
+def search_all():
+    search_term = request.args.get('q', '')
+    page = max(request.args.get('page', 1, type=int), 1)
+    results, has_next = full_text_search(
+        db.session, search_term, page=page,
+        per_page=app.config.get('SEARCH_PAGE_SIZE', 20))
+
+    return render_template(
+        'pages/search.html',
+        results=results,
+        search_term=search_term,
+        page=page,
+        has_next=has_next)
+
+
 #  Animals
 #  ----------------------------------------------------------------
 @app.route('/animals')
 # @requires_auth('get:animal')
 def animals():
-    animals = Animal.query.all()
+    page = keyset_page(Animal.query, Animal.id, **page_args())
 
     return render_template(
         'pages/animals.html', 
-        animals=animals)
+        animals=page.items,
+        page=page)
 
 
 #  Animals -- Search
@@ -74,19 +104,24 @@ def search_animals():
 
     search_term = request.form.get('search_term', '')
     search = "%{}%".format(search_term)
-    animals = Animal.query.filter(
+    # select only the rendered columns as plain rows, not Animal entities
+    query = db.session.query(Animal.id, Animal.genus, Animal.species).filter(
         db.or_(
-        Animal.genus.ilike(search)
+        Animal.genus.ilike(search),
+        Animal.species.ilike(search)
         )
-    ).all()
+    )
+    if db.session.get_bind().dialect.name == 'postgresql':
+        # best trigram match first, served by the pg_trgm GIN indexes
+        query = query.order_by(db.func.greatest(
+            db.func.word_similarity(search_term, Animal.genus),
+            db.func.word_similarity(search_term, Animal.species)).desc(),
+            Animal.id)
+    else:
+        query = query.order_by(Animal.genus, Animal.species, Animal.id)
+    animals = query.limit(app.config.get('SEARCH_RESULT_LIMIT', 50)).all()
 
-    matched_animals = []
-    for animal in animals:
-        matched_animals.append({
-            "id": animal.id,
-            "genus": animal.genus,
-            "species": animal.species
-        })
+    matched_animals = [animal._asdict() for animal in animals]
 
     response = {
         "count": len(animals),
@@ -234,11 +269,12 @@ def delete_animal(animal_id):
 #  ----------------------------------------------------------------
 @app.route('/institutions')
 def institutions():
-    institutions = Institution.query.all()
+    page = keyset_page(Institution.query, Institution.id, **page_args())
 
     return render_template(
         'pages/institutions.html', 
-        institutions=institutions)
+        institutions=page.items,
+        page=page)
 
 
 #  Institutions -- Search
@@ -248,18 +284,13 @@ def search_institutions():
 
     search_term = request.form.get('search_term', '')
     search = "%{}%".format(search_term)
-    institutions = Institution.query.filter(
+    institutions = db.session.query(Institution.id, Institution.name).filter(
         db.or_(
             Institution.name.ilike(search)
         )
     ).all()
 
-    matched_institutions = []
-    for institution in institutions:
-        matched_institutions.append({
-            "id": institution.id,
-            "name": institution.name
-        })
+    matched_institutions = [institution._asdict() for institution in institutions]
 
     response = {
         "count": len(institutions),
@@ -419,13 +450,71 @@ def delete_institution(institution_id):
 
 #  Specimens
 #  ----------------------------------------------------------------
+def sighting_range():
+    # ?since= (inclusive) and ?until= (exclusive) ISO dates; a bounded
+    # sightingdate lets Postgres prune the yearly Specimen partitions
+    return {
+        'since': request.args.get('since', type=dateutil.parser.isoparse),
+        'until': request.args.get('until', type=dateutil.parser.isoparse)
+    }
+
+
+def filter_sightings(query, since=None, until=None):
+    if since is not None:
+        query = query.filter(Specimen.sightingdate >= since)
+    if until is not None:
+        query = query.filter(Specimen.sightingdate < until)
+    return query
+
+
+def iter_specimens(since=None, until=None):
+    # plain column rows fetched through a server-side cursor,
+    # yield_per rows at a time, so memory stays flat however big the table is
+    rows = db.session.query(
+        Specimen.id.label('specimen_id'),
+        Specimen.institution_id,
+        Institution.name.label('institution_name'),
+        Specimen.animal_id,
+        Animal.genus.label('animal_genus'),
+        Specimen.sightingdate).\
+        join(Institution, Specimen.institution_id == Institution.id).\
+        join(Animal, Specimen.animal_id == Animal.id)
+    rows = filter_sightings(rows, since, until).\
+        order_by(Specimen.id).\
+        execution_options(yield_per=app.config.get('SPECIMEN_STREAM_BATCH', 1000))
+
+    for row in rows:
+        specimen = row._asdict()
+        specimen['sightingdate'] = row.sightingdate.strftime('%Y-%m-%d %H:%M:%S')
+        yield specimen
+
+
+def stream_specimens(since=None, until=None):
+    context = {'specimens': iter_specimens(since, until), 'page': None}
+    app.update_template_context(context)
+    stream = app.jinja_env.get_template('pages/specimens.html').stream(context)
+    # flush the rendered html in chunks rather than one write per template event
+    stream.enable_buffering(app.config.get('SPECIMEN_STREAM_BUFFER', 200))
+    return Response(stream_with_context(stream), mimetype='text/html')
+
+
 @app.route('/specimens')
 def specimens():
-    specimens = db.session.query(Specimen).\
-        options(joinedload(Specimen.animal), joinedload(Specimen.institution)).all()
+    # ?stream=1 renders every specimen as a single streamed page
+    sightings = sighting_range()
+    if request.args.get('stream', 0, type=int):
+        return stream_specimens(**sightings)
+
+    query = db.session.query(Specimen).\
+        options(joinedload(Specimen.animal), joinedload(Specimen.institution))
+    page = keyset_page(
+        filter_sightings(query, **sightings), Specimen.id, **page_args())
+    page.filters = {
+        key: request.args[key] for key, value in sightings.items()
+        if value is not None}
     
     data = []
-    for specimen in specimens:
+    for specimen in page.items:
         data.append({
             "specimen_id": specimen.id,
             "institution_id": specimen.institution.id,
@@ -437,7 +526,8 @@ def specimens():
 
     return render_template(
         'pages/specimens.html',
-        specimens=data)
+        specimens=data,
+        page=page)
 
 
 #  Specimens -- Create
@@ -488,6 +578,60 @@ def create_specimen_submission():
             form=form)
 
 
+@app.cli.command('create-specimen-partitions')
+@click.option('--years-ahead', type=int, default=None,
+              help='create partitions through this many years from now')
+def create_specimen_partitions_command(years_ahead):
+    '''Create the yearly Specimen partitions for the coming years.'''
+    if years_ahead is None:
+        years_ahead = app.config.get('SPECIMEN_PARTITION_YEARS_AHEAD', 2)
+    created = partitions.ensure_partitions(db.session, years_ahead)
+    db.session.close()
+    for name in created:
+        click.echo('created {}'.format(name))
+    click.echo('{} partitions created'.format(len(created)))
+
+
+@app.cli.command('ingest-specimens')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']),
+              default=None, help='defaults to the file extension')
+@click.option('--checkpoint', type=click.Path(dir_okay=False), default=None,
+              help='defaults to PATH.checkpoint, rerun to resume')
+@click.option('--rejects', type=click.Path(dir_okay=False), default=None,
+              help='append rejected rows to this NDJSON file')
+@click.option('--batch-size', type=int, default=None)
+def ingest_specimens_command(path, fmt, checkpoint, rejects, batch_size):
+    '''Stream a CSV or NDJSON specimen dump into the database.'''
+    checkpoint = checkpoint or path + '.checkpoint'
+    rejects = open(rejects, 'a', encoding='utf-8') if rejects else None
+
+    def on_reject(row, record, message):
+        if rejects is not None:
+            rejects.write(json.dumps(
+                {'row': row, 'error': message, 'record': record},
+                default=str) + '\n')
+
+    def on_batch(progress):
+        click.echo('\r' + str(progress), nl=False, err=True)
+
+    try:
+        progress = ingest.ingest(
+            db.session, path, fmt=fmt, checkpoint_path=checkpoint,
+            batch_size=batch_size or
+            app.config.get('SPECIMEN_INGEST_BATCH', 5000),
+            on_batch=on_batch, on_reject=on_reject)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    finally:
+        db.session.close()
+        if rejects is not None:
+            rejects.close()
+
+    click.echo('', err=True)
+    click.echo('done in {:.1f}s: {}'.format(progress.elapsed, progress))
+
+
 @app.errorhandler(400)
 def bad_request_error(error):
     return render_template('errors/400.html'), 400
@@ -1,15 +1,18 @@
 import os
+import click
 from flask import Flask, request, jsonify, abort
 from sqlalchemy import exc
-import json
 from flask_cors import CORS
+from fsnd_db import use_primary
 
-from .database.models import db_drop_and_create_all, setup_db, Drink
-from .auth.auth import AuthError, requires_auth
+from .database.models import (
+    bootstrap_db, migrate_recipes, setup_db, db, Drink, menu_cache)
+from .auth.auth import AuthError, auth0, requires_auth
 
 app = Flask(__name__)
 
 setup_db(app)
+auth0.init_app(app)
 CORS(app)
 
 
@@ -26,14 +29,67 @@ def after_request(response):
 
 
 """
-@TODO uncomment the following line to initialize the datbase
-!! NOTE THIS WILL DROP ALL RECORDS AND START YOUR DB FROM SCRATCH
-!! NOTE THIS MUST BE UNCOMMENTED ON FIRST RUN
-!! Running this funciton will add one
+flask bootstrap-db [--seed]
+    creates the missing tables (and the demo drink with --seed) without
+    touching existing data; run it before starting the server, it is safe
+    to run again and from several workers at once
+    db_drop_and_create_all() in database/models.py still wipes the database
 """
-db_drop_and_create_all()
+
+
+@app.cli.command("bootstrap-db")
+@click.option("--seed", is_flag=True, help="add the demo drink to an empty menu")
+def bootstrap_db_command(seed):
+    """Create missing tables, optionally seeding the demo drink."""
+    seeded = bootstrap_db(seed=seed)
+    click.echo("database ready" + (", demo drink added" if seeded else ""))
+
+
+@app.cli.command("migrate-recipes")
+def migrate_recipes_command():
+    """Rewrite recipes stored by the old String column as JSON lists."""
+    click.echo("{} recipes migrated".format(migrate_recipes()))
 
 # ROUTES
+"""
+menu_response(form)
+    the cached menu of every drink in its short or long form, with an ETag
+    so clients revalidating with If-None-Match get a 304 without a body
+    the menu is built from the primary: a lagging replica's rows would be
+    cached under the generation of a write they do not contain yet
+"""
+
+
+def menu_response(form):
+    def build():
+        use_primary(db.session)
+        drinks = Drink.query.order_by(Drink.id).all()
+        return app.json.dumps(
+            {
+                "message": "OK",
+                "success": True,
+                "drinks": [getattr(drink, form)() for drink in drinks]
+            }
+        ).encode()
+
+    body, etag = menu_cache.get(form, build)
+    response = app.response_class(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+"""
+include_all()
+    True when a mutation was called with ?include=all, asking for the
+    whole (cached) long menu instead of only the affected drink
+"""
+
+
+def include_all():
+    return request.args.get("include") == "all"
+
+
 """
 @TODO implement endpoint
     GET /drinks
@@ -47,15 +103,7 @@ db_drop_and_create_all()
 @app.route('/drinks', methods=['GET'], endpoint='get_drinks')
 def retrieve_drinks():
     try:
-        drinks = Drink.query.order_by(Drink.id).all()
-
-        return jsonify(
-            {
-                "message": "OK",
-                "success": True,
-                "drinks": [drink.short() for drink in drinks]
-            }
-        ), 200
+        return menu_response("short")
 
     except AuthError as ex:
         abort(ex.status_code, ex.error)
@@ -75,15 +123,9 @@ def retrieve_drinks():
 @requires_auth("get:drinks-detail")
 def retrieve_drinks_detail(payload):
     try:
-        drinks = Drink.query.order_by(Drink.id).all()
-
-        return jsonify(
-            {
-                "message": "OK",
-                "success": True,
-                "drinks": [drink.long() for drink in drinks]
-            }
-        ), 200
+        response = menu_response("long")
+        response.cache_control.private = True
+        return response
 
     except AuthError as ex:
         abort(ex.status_code, ex.error)
@@ -105,19 +147,23 @@ def retrieve_drinks_detail(payload):
 def create_drink(payload):
     body = request.get_json()
     new_title = body.get("title")
-    recipe_data = body.get("recipe")
-    new_recipe = json.dumps(recipe_data)
+    new_recipe = body.get("recipe")
 
     try:
         new_drink = Drink(title=new_title, recipe=new_recipe)
+    except ValueError:
+        abort(422)
+
+    try:
         new_drink.insert()
-        drinks = Drink.query.order_by(Drink.id).all()
+        if include_all():
+            return menu_response("long")
 
         return jsonify(
             {
                 "message": "OK",
                 "success": True,
-                "drinks": [drink.long() for drink in drinks]
+                "drinks": [new_drink.long()]
             }
         ), 200
 
@@ -138,7 +184,7 @@ def create_drink(payload):
 """
 
 
-@app.route('/drinks/<id>', methods=['PATCH'], endpoint='patch_drink')
+@app.route('/drinks/<int:drink_id>', methods=['PATCH'], endpoint='patch_drink')
 @requires_auth("patch:drinks")
 def update_drink(payload, drink_id):
 
@@ -156,18 +202,21 @@ def update_drink(payload, drink_id):
                 drink.title = new_title
 
         if recipe_data is not None:
-            new_recipe = json.dumps(recipe_data)
-            if new_recipe != drink.recipe:
-                drink.recipe = new_recipe
+            if recipe_data != drink.recipe:
+                try:
+                    drink.recipe = recipe_data
+                except ValueError:
+                    abort(422)
 
         drink.update()
-        drinks = Drink.query.order_by(Drink.id).all()
+        if include_all():
+            return menu_response("long")
 
         return jsonify(
             {
                 "message": "OK",
                 "success": True,
-                "drinks": [drink.long() for drink in drinks]
+                "drinks": [drink.long()]
             }
         ), 200
 
@@ -193,18 +242,20 @@ def delete_drink(payload, drink_id):
 
     try:
         drink = Drink.query.filter(Drink.id == drink_id).one_or_none()
-        if drink is not None:
-            drink.delete()
-            drinks = Drink.query.order_by(Drink.id).all()
-        else:
+        if drink is None:
             abort(404)
+
+        drink.delete()
+        if include_all():
+            return menu_response("long")
+
         return jsonify(
             {
                 "message": "OK",
                 "success": True,
-                "drinks": [drink.long() for drink in drinks]
+                "delete": drink_id
             }
-        )
+        ), 200
 
     except AuthError as ex:
         abort(ex.status_code, ex.error)
@@ -254,17 +305,6 @@ def not_found(error):
 
 
 """
-@TODO implement error handler for AuthError
-    error handler should conform to general task above
+Error handler for AuthError
+    registered by auth0.init_app(app) and shared with the other apps
 """
-
-
-@app.errorhandler(AuthError)
-def autherror_handler(ex):
-    return jsonify(
-        {
-            "success": False,
-            "error": ex.status_code,
-            "message": ex.error["description"]
-        }
-    ), ex.status_code
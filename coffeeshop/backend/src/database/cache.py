@@ -0,0 +1,147 @@
+import hashlib
+import os
+import threading
+import time
+import uuid
+
+
+"""
+MemoryBackend
+keeps entries in this process only, for at most `ttl` seconds
+
+    invalidate() only reaches the process that did the write, so with
+    several workers the others serve the old menu until their entry expires;
+    the ttl bounds that, use FileBackend when it must be immediate
+"""
+
+
+class MemoryBackend:
+    def __init__(self, ttl=5):
+        self.ttl = ttl
+        self._entries = {}
+        self._generation = uuid.uuid4().hex
+        self._lock = threading.Lock()
+
+    def generation(self):
+        return self._generation
+
+    def bump(self):
+        with self._lock:
+            self._generation = uuid.uuid4().hex
+            self._entries.clear()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            return None
+        return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+
+
+"""
+FileBackend
+keeps entries as files in directory, shared by every worker on the host
+so a write served by one worker invalidates the menu for all of them
+"""
+
+
+class FileBackend:
+    GENERATION = "generation"
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def _write(self, key, data):
+        tmp = "{}.{}.tmp".format(self._path(key), uuid.uuid4().hex)
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._path(key))
+
+    def generation(self):
+        try:
+            with open(self._path(self.GENERATION), "rb") as f:
+                return f.read().decode()
+        except FileNotFoundError:
+            return ""
+
+    def bump(self):
+        previous = self.generation()
+        self._write(self.GENERATION, uuid.uuid4().hex.encode())
+        for name in os.listdir(self.directory):
+            if previous and name.endswith("." + previous):
+                try:
+                    os.remove(self._path(name))
+                except FileNotFoundError:
+                    pass
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                etag, _, body = f.read().partition(b"\n")
+        except FileNotFoundError:
+            return None
+        return body, etag.decode()
+
+    def set(self, key, value):
+        body, etag = value
+        self._write(key, etag.encode() + b"\n" + body)
+
+
+"""
+MenuCache
+the serialized drinks menus, rebuilt on the first read after a change
+
+    entries are stored under the backend's current generation, invalidate()
+    starts a new one, so a menu built from rows read before a write can
+    never be served after it; build() must read from the database the
+    write went to (the primary, not a replica that may lag behind it)
+
+EXAMPLE
+    body, etag = menu_cache.get("short", build_short_menu)
+    menu_cache.invalidate()
+"""
+
+
+class MenuCache:
+    def __init__(self, backend=None):
+        self.backend = backend or MemoryBackend()
+
+    def get(self, form, build):
+        """
+        returns (body, etag) for form, calling build() for the body on a miss
+        """
+        key = "{}.{}".format(form, self.backend.generation())
+        entry = self.backend.get(key)
+        if entry is None:
+            body = build()
+            entry = (body, hashlib.sha256(body).hexdigest()[:32])
+            self.backend.set(key, entry)
+        return entry
+
+    def invalidate(self):
+        self.backend.bump()
+
+
+"""
+cache_backend(environ=os.environ)
+    MENU_CACHE_DIR=<path> shares the menus between workers through files,
+    otherwise each process keeps its own copy in memory for MENU_CACHE_TTL
+    seconds (default 5)
+"""
+
+
+def cache_backend(environ=os.environ):
+    directory = environ.get("MENU_CACHE_DIR")
+    if directory:
+        return FileBackend(directory)
+    return MemoryBackend(ttl=float(environ.get("MENU_CACHE_TTL", 5)))
@@ -1,26 +1,47 @@
+import contextlib
 import os
-from sqlalchemy import Column, String, Integer
+from sqlalchemy import JSON, Column, String, Integer, select, type_coerce, update
+from sqlalchemy.orm import validates
 from flask_sqlalchemy import SQLAlchemy
 import json
+from fsnd_db import (
+    ReplicaRouter, RoutingSession, apply_sqlite_pragmas, sqlite_pragmas)
+
+from .cache import MenuCache, cache_backend
 
 database_filename = "database.db"
 project_dir = os.path.dirname(os.path.abspath(__file__))
 database_path = "sqlite:///{}".format(
     os.path.join(project_dir, database_filename))
+# held while bootstrap_db() runs, so concurrent workers take turns
+lock_path = os.path.join(project_dir, database_filename + ".lock")
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
-db = SQLAlchemy()
+# the serialized /drinks and /drinks-detail menus, invalidated by every
+# Drink.insert(), update() and delete()
+menu_cache = MenuCache()
 
 '''
 setup_db(app)
     binds a flask application and a SQLAlchemy service
+    DATABASE_URL overrides the bundled database.db (e.g. for the tests)
+    GET requests read from SQLALCHEMY_REPLICA_URIS when that env var is set
+    the menu cache is shared through files when MENU_CACHE_DIR is set
+    connections run the SQLite performance profile (WAL etc.), which the
+    SQLITE_* env vars tune, see fsnd_db/sqlite.py
 '''
 
 
 def setup_db(app):
-    app.config["SQLALCHEMY_DATABASE_URI"] = database_path
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get(
+        "DATABASE_URL", database_path)
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-    db.app = app
+    app.config.setdefault("SQLITE_PRAGMAS", sqlite_pragmas())
+    ReplicaRouter(app)
     db.init_app(app)
+    apply_sqlite_pragmas(app, db)
+    menu_cache.backend = cache_backend()
 
 
 '''
@@ -37,11 +58,126 @@ def db_drop_and_create_all():
     # add one demo row which is helping in POSTMAN test
     drink = Drink(
         title='water',
-        recipe='[{"name": "water", "color": "blue", "parts": 1}]'
+        recipe=[{"name": "water", "color": "blue", "parts": 1}]
     )
 
 
     drink.insert()
+
+
+'''
+_file_lock(path)
+    holds an exclusive lock on path for the with block, waiting for it,
+    through fcntl on POSIX and msvcrt on Windows
+'''
+
+
+@contextlib.contextmanager
+def _file_lock(path):
+    with open(path, "a+b") as lock:
+        if os.name == "nt":
+            import msvcrt
+            lock.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after 10 seconds
+                    continue
+            try:
+                yield
+            finally:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+'''
+bootstrap_db(seed=False)
+    creates whatever tables are missing and migrates old recipes, leaving
+    existing data alone, so it is safe to run on every deploy or worker start
+    seed=True adds the demo drink when there are no drinks yet
+    runs under an exclusive lock on lock_path, concurrent callers wait
+    returns True when the demo drink was added
+'''
+
+
+def bootstrap_db(seed=False):
+    with _file_lock(lock_path):
+        db.create_all()
+        migrate_recipes()
+        if seed and db.session.query(Drink.id).first() is None:
+            Drink(
+                title='water',
+                recipe=[{"name": "water", "color": "blue", "parts": 1}]
+            ).insert()
+            return True
+        return False
+
+
+'''
+migrate_recipes()
+    rewrites recipes left behind by the old String column in the form the
+    JSON column expects: a list of ingredients encoded once
+    (rows holding a json encoded string, or a single ingredient object)
+    returns the number of rows fixed, running it again fixes nothing
+    raises ValueError naming the first drink whose recipe cannot be fixed
+'''
+
+
+def migrate_recipes():
+    raw = type_coerce(Drink.recipe, String)
+    fixed = 0
+    for drink_id, stored in db.session.execute(select(Drink.id, raw)):
+        try:
+            recipe = _normalize_recipe(stored)
+        except ValueError as e:
+            raise ValueError("drink {}: {}".format(drink_id, e))
+        if json.dumps(recipe) != stored:
+            db.session.execute(
+                update(Drink).where(Drink.id == drink_id).values(recipe=recipe))
+            fixed += 1
+    db.session.commit()
+    if fixed:
+        menu_cache.invalidate()
+    return fixed
+
+
+INGREDIENT_KEYS = frozenset(("name", "color", "parts"))
+
+
+'''
+_normalize_recipe(recipe)
+    returns recipe as a non empty list of ingredient objects, accepting a
+    single object or a json encoded string of either
+    raises ValueError for anything else
+'''
+
+
+def _normalize_recipe(recipe):
+    while isinstance(recipe, str):
+        try:
+            recipe = json.loads(recipe)
+        except ValueError:
+            raise ValueError("recipe is not valid JSON")
+    if isinstance(recipe, dict):
+        recipe = [recipe]
+    if not isinstance(recipe, list) or not recipe or not all(
+            isinstance(ingredient, dict) and INGREDIENT_KEYS <= ingredient.keys()
+            for ingredient in recipe):
+        raise ValueError(
+            "recipe must be a non empty list of {name, color, parts} "
+            "ingredient objects")
+    return recipe
+
+
 # ROUTES
 
 '''
@@ -55,9 +191,13 @@ class Drink(db.Model):
     id = Column(Integer().with_variant(Integer, "sqlite"), primary_key=True)
     # String Title
     title = Column(String(80), unique=True)
-    # the ingredients blob - this stores a lazy json blob
+    # the ingredients, decoded once when the row is loaded
     # the required datatype is [{'color': string, 'name':string, 'parts':number}]
-    recipe = Column(String(180), nullable=False)
+    recipe = Column(JSON, nullable=False)
+
+    @validates('recipe')
+    def validate_recipe(self, key, recipe):
+        return _normalize_recipe(recipe)
 
     '''
     short()
@@ -65,8 +205,7 @@ class Drink(db.Model):
     '''
 
     def short(self):
-        print(json.loads(self.recipe))
-        short_recipe = [{'color': r['color'], 'parts': r['parts']} for r in json.loads(self.recipe)]
+        short_recipe = [{'color': r['color'], 'parts': r['parts']} for r in self.recipe]
         return {
             'id': self.id,
             'title': self.title,
@@ -82,7 +221,7 @@ class Drink(db.Model):
         return {
             'id': self.id,
             'title': self.title,
-            'recipe': json.loads(self.recipe)
+            'recipe': self.recipe
         }
 
     '''
@@ -98,6 +237,7 @@ class Drink(db.Model):
     def insert(self):
         db.session.add(self)
         db.session.commit()
+        menu_cache.invalidate()
 
     '''
     delete()
@@ -111,6 +251,7 @@ class Drink(db.Model):
     def delete(self):
         db.session.delete(self)
         db.session.commit()
+        menu_cache.invalidate()
 
     '''
     update()
@@ -124,6 +265,7 @@ class Drink(db.Model):
 
     def update(self):
         db.session.commit()
+        menu_cache.invalidate()
 
     def __repr__(self):
         return json.dumps(self.short())
@@ -0,0 +1,5 @@
+from .auth import Auth0
+from .cache import TokenCache
+from .errors import AuthError, handle_auth_error
+from .keys import JWKSKeyStore, get_key_store
+from .permissions import compile_permission, granted_permissions
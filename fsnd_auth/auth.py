@@ -0,0 +1,204 @@
+from flask import request
+from functools import wraps
+from jose import jwt
+
+from .cache import TokenCache
+from .errors import AuthError, handle_auth_error
+from .keys import get_key_store
+from .permissions import compile_permission, granted_permissions
+
+
+"""
+Auth0
+Verifies Auth0 bearer tokens for a Flask app.
+
+    domain: the Auth0 tenant, i.e. "dev-xxxx.us.auth0.com"
+    audience: the API identifier the tokens are issued for
+    issuer: defaults to https://<domain>/
+
+    signing keys come from the process-wide key store for the tenant
+    verified payloads are kept in a per-instance TokenCache until they expire
+
+EXAMPLE
+    auth0 = Auth0(AUTH0_DOMAIN, API_AUDIENCE)
+    auth0.init_app(app)
+
+    @app.route("/drinks-detail")
+    @auth0.requires_auth("get:drinks-detail")
+    def drinks_detail(payload):
+        ...
+"""
+
+
+class Auth0:
+    def __init__(self, domain, audience, issuer=None, algorithms=("RS256",),
+                 token_cache_size=1024, app=None):
+        self.domain = domain
+        self.audience = audience
+        self.issuer = issuer or f"https://{domain}/"
+        self.algorithms = list(algorithms)
+        self.key_store = get_key_store(
+            f"https://{domain}/.well-known/jwks.json",
+            algorithm=self.algorithms[0])
+        self.token_cache = TokenCache(maxsize=token_cache_size)
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions["fsnd_auth"] = self
+        app.register_error_handler(AuthError, handle_auth_error)
+
+    '''
+    get_token_auth_header()
+        returns the token part of the Authorization header
+        raises an AuthError if the header is missing or malformed
+    '''
+
+    def get_token_auth_header(self):
+        auth = request.headers.get("Authorization", None)
+        if not auth:
+            raise AuthError(
+                {
+                    "code": "authorization_header_missing",
+                    "description": "Authorization header is expected."
+                }, 401)
+
+        parts = auth.split()
+
+        if len(parts) == 1 and parts[0].lower() == "bearer":
+            raise AuthError(
+                {
+                    "code": "invalid_header",
+                    "description": "Token not found."
+                }, 401)
+        elif len(parts) != 2:
+            raise AuthError(
+                {
+                    "code": "invalid_header",
+                    "description": "Authorization header must be bearer token."
+                }, 401)
+        elif parts[0].lower() != "bearer":
+            raise AuthError(
+                {
+                    "code": "invalid_header",
+                    "description": "Authorization header must start with 'Bearer'."
+                }, 401)
+
+        return parts[1]
+
+    '''
+    check_permissions(permission, payload)
+        raises an AuthError if permission is not granted by the payload
+        return true otherwise
+    '''
+
+    def check_permissions(self, permission, payload):
+        return compile_permission(permission)(granted_permissions(payload))
+
+    '''
+    verify_decode_jwt(token)
+        verifies the token signature against the tenant's signing keys,
+        validates the claims and returns the decoded payload
+    '''
+
+    def verify_decode_jwt(self, token):
+        try:
+            unverified_header = jwt.get_unverified_header(token)
+        except jwt.JWTError:
+            raise AuthError(
+                {
+                    "code": "invalid_header",
+                    "description": "Unable to parse authentication token."
+                }, 400
+            )
+
+        if "kid" not in unverified_header:
+            raise AuthError(
+                {
+                    "code": "invalid_header",
+                    "description": "Authorization malformed."
+                }, 401
+            )
+
+        rsa_key = self.key_store.get(unverified_header["kid"])
+        if rsa_key is None:
+            raise AuthError(
+                {
+                    "code": "invalid_header",
+                    "description": "Unable to find the appropriate key."
+                }, 400
+            )
+
+        try:
+            return jwt.decode(
+                token,
+                rsa_key,
+                algorithms=self.algorithms,
+                audience=self.audience,
+                issuer=self.issuer
+            )
+
+        except jwt.ExpiredSignatureError:
+            raise AuthError(
+                {
+                    "code": "token_expired",
+                    "description": "Token expired."
+                }, 401
+            )
+
+        except jwt.JWTClaimsError:
+            raise AuthError(
+                {
+                    "code": "invalid_claims",
+                    "description": "Incorrect claims. Please, check the audience and issuer."
+                }, 401
+            )
+        except Exception:
+            raise AuthError(
+                {
+                    "code": "invalid_header",
+                    "description": "Unable to parse authentication token."
+                }, 400
+            )
+
+    '''
+    authenticate()
+        returns the verified (payload, permissions) pair for the current request,
+        from the token cache when the same token was seen before
+    '''
+
+    def authenticate(self):
+        token = self.get_token_auth_header()
+        entry = self.token_cache.get(token)
+        if entry is None:
+            payload = self.verify_decode_jwt(token)
+            permissions = granted_permissions(payload)
+            self.token_cache.set(token, payload, permissions)
+            entry = payload, permissions
+        return entry
+
+    '''
+    requires_auth(permission, any_of=(), all_of=())
+        @INPUTS
+            permission: string permission (i.e. "post:drinks"),
+                empty to only require a valid token
+            any_of: permissions of which at least one must be granted
+            all_of: permissions which must all be granted
+
+        passes the decoded payload to the decorated method
+    '''
+
+    def requires_auth(self, permission="", any_of=(), all_of=()):
+        check_permission = compile_permission(permission, any_of, all_of)
+
+        def requires_auth_decorator(f):
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                payload, permissions = self.authenticate()
+                check_permission(permissions)
+                return f(payload, *args, **kwargs)
+
+            return wrapper
+
+        return requires_auth_decorator
@@ -0,0 +1,76 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+"""
+TokenCache
+A bounded LRU cache of verified JWT payloads, keyed by a sha256 digest of the token.
+
+    each entry holds the payload and its permissions frozenset
+    entries expire at the token's exp claim
+    tokens without an exp claim are never cached
+    hits, misses and evictions are counted so the saved RSA verifications can be measured
+"""
+
+
+class TokenCache:
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(token):
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token):
+        """
+        returns the cached (payload, permissions) pair for token, or None
+        """
+        digest = self._digest(token)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            payload, permissions, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[digest]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return payload, permissions
+
+    def set(self, token, payload, permissions=None):
+        expires_at = payload.get("exp")
+        if not isinstance(expires_at, (int, float)):
+            return
+
+        digest = self._digest(token)
+        with self._lock:
+            self._entries[digest] = (payload, permissions, expires_at)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
@@ -0,0 +1,29 @@
+from flask import jsonify
+
+
+"""
+AuthError Exception
+A standardized way to communicate auth failure modes
+"""
+
+
+class AuthError(Exception):
+    def __init__(self, error, status_code):
+        self.error = error
+        self.status_code = status_code
+
+
+"""
+handle_auth_error(ex)
+    the error handler registered by Auth0.init_app
+"""
+
+
+def handle_auth_error(ex):
+    return jsonify(
+        {
+            "success": False,
+            "error": ex.status_code,
+            "message": ex.error["description"]
+        }
+    ), ex.status_code
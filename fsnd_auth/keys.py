@@ -0,0 +1,128 @@
+import threading
+import time
+import requests
+from jose import jwk
+
+
+# one HTTP session (and connection pool) for every JWKS fetch in the process
+http = requests.Session()
+
+
+"""
+JWKSKeyStore
+A process-wide cache of the Auth0 signing keys, indexed by kid.
+
+    the key set is fetched once and refreshed in the background every `ttl` seconds
+    each public key object is constructed once per kid and reused by jwt.decode
+    an unknown kid triggers a single refetch (rate limited by `min_refetch_interval`)
+    if the endpoint cannot be reached the last good key set keeps being served
+"""
+
+
+class JWKSKeyStore:
+    def __init__(self, jwks_url, algorithm="RS256", ttl=600,
+                 min_refetch_interval=30, timeout=5):
+        self.jwks_url = jwks_url
+        self.algorithm = algorithm
+        self.ttl = ttl
+        self.min_refetch_interval = min_refetch_interval
+        self.timeout = timeout
+        self.fetch_count = 0
+        self.fetch_errors = 0
+        self._keys = {}
+        self._last_attempt = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _fetch(self):
+        response = http.get(self.jwks_url, timeout=self.timeout)
+        response.raise_for_status()
+        self.fetch_count += 1
+        return response.json().get("keys", [])
+
+    def refresh(self):
+        """
+        refetch the key set, keeping the cached keys if the request fails
+        returns True if the key set was replaced
+        """
+        with self._lock:
+            self._last_attempt = time.monotonic()
+            try:
+                jwks = self._fetch()
+            except (requests.RequestException, ValueError):
+                self.fetch_errors += 1
+                return False
+
+            keys = {}
+            for key in jwks:
+                if "kid" not in key:
+                    continue
+                # reuse the constructed object when the key did not change
+                existing = self._keys.get(key["kid"])
+                if existing is not None and existing[0] == key:
+                    keys[key["kid"]] = existing
+                else:
+                    keys[key["kid"]] = (key, jwk.construct(key, self.algorithm))
+            self._keys = keys
+            return True
+
+    def _run(self):
+        while not self._stop.wait(self.ttl):
+            self.refresh()
+
+    def start(self):
+        """
+        start the background refresh thread (idempotent)
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="jwks-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def get(self, kid):
+        """
+        returns the public key object for kid, or None if the authorization
+        server does not know about it either
+        """
+        if self._last_attempt is None:
+            self.refresh()
+            self.start()
+
+        entry = self._keys.get(kid)
+        if entry is None:
+            # the signing key may have been rotated since the last refresh,
+            # refetch once unless we just did
+            last_attempt = self._last_attempt
+            if (last_attempt is None or
+                    time.monotonic() - last_attempt >= self.min_refetch_interval):
+                self.refresh()
+                entry = self._keys.get(kid)
+
+        if entry is None:
+            return None
+        return entry[1]
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+"""
+get_key_store(jwks_url)
+    returns the shared JWKSKeyStore for jwks_url,
+    so every app in the process talking to the same tenant shares one key cache
+"""
+
+
+def get_key_store(jwks_url, **kwargs):
+    with _stores_lock:
+        store = _stores.get(jwks_url)
+        if store is None:
+            store = _stores[jwks_url] = JWKSKeyStore(jwks_url, **kwargs)
+        return store
@@ -0,0 +1,69 @@
+import sys
+
+from .errors import AuthError
+
+
+"""
+granted_permissions(payload)
+    returns the payload's permissions claim as a frozenset,
+    or None if the claim is missing
+    computed once per verified token and kept next to it in the TokenCache
+"""
+
+
+def granted_permissions(payload):
+    if "permissions" not in payload:
+        return None
+    return frozenset(payload["permissions"])
+
+
+def _intern_all(permissions):
+    if isinstance(permissions, str):
+        permissions = [permissions]
+    return frozenset(sys.intern(p) for p in permissions if p)
+
+
+"""
+compile_permission(permission, any_of=(), all_of=())
+    @INPUTS
+        permission: string permission (i.e. "post:drinks")
+        any_of: permissions of which at least one must be granted
+        all_of: permissions which must all be granted
+
+    returns a checker built once, when the route is decorated
+    the checker takes the frozenset from granted_permissions()
+    so each check is a set lookup instead of a scan of the permissions list
+    with nothing required the checker only needs a valid token
+    the checker raises an AuthError if permissions are not included in the payload
+    the checker raises an AuthError if a required permission is not granted
+"""
+
+
+def compile_permission(permission="", any_of=(), all_of=()):
+    required_all = _intern_all(all_of) | _intern_all(permission)
+    required_any = _intern_all(any_of)
+
+    if not required_all and not required_any:
+        return lambda granted: True
+
+    def check_permission(granted):
+        if granted is None:
+            raise AuthError(
+                {
+                    "code": "invalid_claims",
+                    "description": "Permissions not included in JWT."
+                }, 400
+            )
+
+        if not (required_all <= granted and
+                (not required_any or not required_any.isdisjoint(granted))):
+            raise AuthError(
+                {
+                    "code": "unauthorized",
+                    "description": "Permission not found."
+                }, 403
+            )
+
+        return True
+
+    return check_permission
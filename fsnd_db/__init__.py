@@ -0,0 +1,3 @@
+from .pool import PoolMonitor, TimedQueuePool, engine_options, pool_stats
+from .routing import ReplicaRouter, RoutingSession, replica_uris, use_primary
+from .sqlite import apply_sqlite_pragmas, sqlite_pragmas
@@ -0,0 +1,157 @@
+import bisect
+import os
+import threading
+import time
+from flask import current_app, jsonify
+from sqlalchemy.pool import NullPool, QueuePool
+
+
+# upper bounds, in seconds, of the checkout wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Histogram
+    thread safe counts of observed values per bucket, plus their count and sum
+    """
+
+    def __init__(self, buckets=WAIT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self):
+        """
+        returns count, sum and cumulative bucket counts keyed by upper bound
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        buckets = {}
+        running = 0
+        for bound, count in zip(self.buckets + ("+Inf",), counts):
+            running += count
+            buckets[str(bound)] = running
+        return {"count": running, "sum": total, "buckets": buckets}
+
+
+class TimedQueuePool(QueuePool):
+    """
+    TimedQueuePool
+    a QueuePool that records how long every checkout waited for a connection
+    (including opening a new one when the pool is not full yet)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_times = Histogram()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.wait_times = self.wait_times
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.wait_times.observe(time.perf_counter() - started)
+
+
+"""
+engine_options(config)
+    returns SQLALCHEMY_ENGINE_OPTIONS for the DB_POOL_* values in config
+    DB_NULL_POOL opens and closes a connection per checkout, for running
+    behind PgBouncer in transaction mode, and ignores the sizing values
+"""
+
+
+def engine_options(config):
+    options = {"pool_pre_ping": config.get("DB_POOL_PRE_PING", True)}
+    if config.get("DB_NULL_POOL", False):
+        options["poolclass"] = NullPool
+        return options
+    options.update({
+        "poolclass": TimedQueuePool,
+        "pool_size": config.get("DB_POOL_SIZE", 5),
+        "max_overflow": config.get("DB_MAX_OVERFLOW", 10),
+        "pool_timeout": config.get("DB_POOL_TIMEOUT", 30),
+        "pool_recycle": config.get("DB_POOL_RECYCLE", 1800),
+    })
+    return options
+
+
+def pool_stats(engine):
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+        })
+    wait_times = getattr(pool, "wait_times", None)
+    if wait_times is not None:
+        stats["wait_seconds"] = wait_times.snapshot()
+    return stats
+
+
+"""
+PoolMonitor
+Sizes the connection pools from config and reports on them.
+
+    fills SQLALCHEMY_ENGINE_OPTIONS from the DB_POOL_* config values unless
+    the app sets it itself; Flask-SQLAlchemy only applies that to the default
+    engine, so binds given as a plain uri (the replicas) are rewritten to
+    carry the same options
+    with DB_POOL_METRICS set, GET /internal/pool returns each engine's pool
+    usage and checkout wait histogram for this worker process; it has no
+    auth of its own, only enable it where /internal is not publicly routed
+
+    init_app must run after ReplicaRouter.init_app, which adds the replica
+    binds, and before db.init_app, which creates the engines
+
+EXAMPLE
+    PoolMonitor(app)
+    db.init_app(app)
+"""
+
+
+class PoolMonitor:
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        options = app.config.setdefault(
+            "SQLALCHEMY_ENGINE_OPTIONS", engine_options(app.config))
+        binds = app.config.get("SQLALCHEMY_BINDS") or {}
+        for key, value in binds.items():
+            if isinstance(value, str):
+                binds[key] = {"url": value, **options}
+
+        if app.config.get("DB_POOL_METRICS", False):
+            app.add_url_rule(
+                "/internal/pool", "internal_pool", self.report,
+                methods=["GET"])
+
+    def report(self):
+        engines = current_app.extensions["sqlalchemy"].engines
+        return jsonify({
+            "pid": os.getpid(),
+            "engines": {
+                key or "default": pool_stats(engine)
+                for key, engine in engines.items()
+            }
+        })
@@ -0,0 +1,148 @@
+import os
+import random
+import re
+import time
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.expression import TextClause
+
+
+READ_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+REPLICA_PREFIX = "replica_"
+STICKY_COOKIE = "fsnd_db_primary"
+PRIMARY = "fsnd_db.primary"
+
+# raw sql sent through text() counts as a read only when it starts like one
+READ_SQL = re.compile(r"\s*(select|with)\b", re.IGNORECASE)
+
+
+"""
+replica_uris(value)
+    returns the replica database uris from a list or a comma separated string
+"""
+
+
+def replica_uris(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [uri.strip() for uri in value if uri and uri.strip()]
+
+
+"""
+use_primary(session)
+    pins session to the primary for the rest of its life (the current request),
+    for reads that must see the request's own writes or raw sql that writes
+"""
+
+
+def use_primary(session):
+    session.info[PRIMARY] = True
+
+
+def _is_read(clause):
+    if clause is None:
+        return False
+    if getattr(clause, "_for_update_arg", None) is not None:
+        return False
+    if isinstance(clause, TextClause):
+        return READ_SQL.match(clause.text) is not None
+    return bool(getattr(clause, "is_select", False))
+
+
+"""
+RoutingSession
+A Flask-SQLAlchemy session that sends reads to a replica.
+
+    reads are routed only while the request was given a replica by
+    ReplicaRouter (a GET/HEAD/OPTIONS request from a client that has not
+    written recently) and only for tables on the default bind
+    flushes, DML and anything that is not recognisably a read go to the
+    primary, and pin the session there so later reads see those writes
+    get_bind() without a statement returns the primary engine without
+    pinning, so checking the dialect does not take a request off the replica
+
+EXAMPLE
+    db = SQLAlchemy(session_options={"class_": RoutingSession})
+"""
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(
+            mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or self.info.get(PRIMARY):
+            return engine
+
+        replica = g.get("fsnd_db_replica") if has_request_context() else None
+        if replica is None or engine is not self._db.engines.get(None):
+            return engine
+
+        if clause is None and not self._flushing:
+            # get_bind() with no statement, e.g. to look at the dialect
+            return engine
+        if self._flushing or not _is_read(clause):
+            use_primary(self)
+            return engine
+        return self._db.engines[replica]
+
+
+"""
+ReplicaRouter
+Registers read replicas as binds and picks one for each read-only request.
+
+    replicas come from SQLALCHEMY_REPLICA_URIS (list or comma separated),
+    falling back to the environment variable of the same name; with none
+    configured every query goes to SQLALCHEMY_DATABASE_URI as before
+    after a POST/PUT/PATCH/DELETE the client gets a cookie that keeps its
+    requests on the primary for SQLALCHEMY_READ_YOUR_WRITES seconds, so it
+    reads its own writes while the replicas catch up
+
+    init_app must run before db.init_app, which creates the bind engines
+
+EXAMPLE
+    ReplicaRouter(app)
+    db.init_app(app)
+"""
+
+
+class ReplicaRouter:
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        uris = replica_uris(app.config.get(
+            "SQLALCHEMY_REPLICA_URIS",
+            os.environ.get("SQLALCHEMY_REPLICA_URIS")))
+        binds = app.config.setdefault("SQLALCHEMY_BINDS", {})
+        keys = []
+        for index, uri in enumerate(uris):
+            key = "{}{}".format(REPLICA_PREFIX, index)
+            binds[key] = uri
+            keys.append(key)
+
+        app.config.setdefault("SQLALCHEMY_READ_YOUR_WRITES", 5)
+        app.extensions["fsnd_db"] = {"replicas": keys}
+        app.before_request(self.route_request)
+        app.after_request(self.stick_to_primary)
+
+    def route_request(self):
+        replicas = current_app.extensions["fsnd_db"]["replicas"]
+        if not replicas or request.method not in READ_METHODS:
+            return
+        sticky_until = request.cookies.get(STICKY_COOKIE, type=float)
+        if sticky_until is not None and sticky_until > time.time():
+            return
+        g.fsnd_db_replica = random.choice(replicas)
+
+    def stick_to_primary(self, response):
+        if request.method in READ_METHODS or \
+                not current_app.extensions["fsnd_db"]["replicas"]:
+            return response
+        seconds = current_app.config["SQLALCHEMY_READ_YOUR_WRITES"]
+        response.set_cookie(
+            STICKY_COOKIE, str(time.time() + seconds),
+            max_age=seconds, httponly=True, samesite="Lax")
+        return response
@@ -0,0 +1,70 @@
+import os
+import re
+from sqlalchemy import event
+
+
+# the order matters: journal_mode first, the rest are per connection
+DEFAULT_PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("cache_size", -20000),
+    ("mmap_size", 268435456),
+    ("busy_timeout", 5000),
+)
+PRAGMA_VALUE = re.compile(r"^-?\w+$")
+
+
+"""
+sqlite_pragmas(environ=os.environ)
+    returns the pragmas of the SQLite performance profile, each one can be
+    overridden through SQLITE_<NAME> (e.g. SQLITE_BUSY_TIMEOUT=10000)
+    or left out with an empty value; SQLITE_PROFILE=off disables them all
+
+    journal_mode=WAL     readers no longer wait for a writer, or block it
+    synchronous=NORMAL   fsync at checkpoints rather than every commit,
+                         still safe against corruption in WAL mode
+    cache_size           page cache per connection (negative: KiB)
+    mmap_size            bytes of the file read through mmap
+    busy_timeout         ms a writer waits for the lock before failing
+"""
+
+
+def sqlite_pragmas(environ=os.environ):
+    if environ.get("SQLITE_PROFILE", "on").lower() in ("0", "off", "false"):
+        return []
+    pragmas = []
+    for name, default in DEFAULT_PRAGMAS:
+        value = str(environ.get("SQLITE_" + name.upper(), default)).strip()
+        if not value:
+            continue
+        if not PRAGMA_VALUE.match(value):
+            raise ValueError("invalid SQLITE_{}: {!r}".format(name.upper(), value))
+        pragmas.append((name, value))
+    return pragmas
+
+
+"""
+apply_sqlite_pragmas(app, db, pragmas=None)
+    runs the pragmas (default: SQLITE_PRAGMAS from app.config) on every new
+    connection of the app's SQLite engines; call it after db.init_app
+"""
+
+
+def apply_sqlite_pragmas(app, db, pragmas=None):
+    if pragmas is None:
+        pragmas = app.config.get("SQLITE_PRAGMAS", [])
+    if not pragmas:
+        return
+
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute("PRAGMA {} = {}".format(name, value))
+        finally:
+            cursor.close()
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == "sqlite":
+                event.listen(engine, "connect", on_connect)
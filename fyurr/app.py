@@ -12,9 +12,14 @@ from flask import (
     abort)
 from flask import Response, flash
 from models import db, Venue, Artist, Show
+from cache import TTLCache, clear_on_commit
+import feed
+import bulk
 from flask_moment import Moment
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from fsnd_db import PoolMonitor, ReplicaRouter
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 import logging
 from logging import Formatter, FileHandler
 from flask_wtf import Form
@@ -22,6 +27,8 @@ from forms import *
 import json
 import dateutil.parser
 import babel
+import click
+import codecs
 import sys
 # ----------------------------------------------------------------------------#
 # App Config.
@@ -30,10 +37,17 @@ import sys
 app = Flask(__name__)
 moment = Moment(app)
 app.config.from_object('config')
+# replica binds and pool options have to be in place before db.init_app
+ReplicaRouter(app)
+PoolMonitor(app)
 db.init_app(app)
 
 migrate = Migrate(app, db)
 
+# the grouped /venues listing, dropped whenever a venue or show is written
+venues_cache = TTLCache(ttl=app.config.get('VENUES_CACHE_TTL', 30))
+clear_on_commit(venues_cache, Venue, Show)
+
 # TO/DO: connect to a local postgresql database
 
 
@@ -77,21 +91,58 @@ def venues():
     # num_upcoming_shows should be aggregated
     # based on number of upcoming shows per venue.
 
-    venues = Venue.query.all()
-    data = []
-    for venue in venues:
-        data.append({
-            "city": venue.city,
-            "state": venue.state,
-            "venues": [{
-                "id": venue.id,
-                "name": venue.name,
-            }]
-        })
+    data = venues_cache.get('areas')
+    if data is None:
+        data = venue_areas(datetime.now())
+        venues_cache.set('areas', data)
 
     return render_template('pages/venues.html', areas=data)
 
 
+def venue_areas(now):
+    # one grouped query: upcoming shows counted per venue,
+    # then venues aggregated per (city, state); joining only upcoming
+    # shows keeps this a range scan of ix_Show_start_time
+    per_venue = db.session.query(
+        Venue.id,
+        Venue.name,
+        Venue.city,
+        Venue.state,
+        db.func.count(Show.id).label('num_upcoming_shows')).\
+        outerjoin(Show, db.and_(
+            Show.venue_id == Venue.id, Show.start_time > now)).\
+        group_by(Venue.id).\
+        subquery()
+
+    if db.session.get_bind().dialect.name == 'postgresql':
+        venues = db.func.json_agg(aggregate_order_by(
+            db.func.json_build_object(
+                'id', per_venue.c.id,
+                'name', per_venue.c.name,
+                'num_upcoming_shows', per_venue.c.num_upcoming_shows),
+            per_venue.c.name))
+    else:
+        venues = db.func.json_group_array(db.func.json_object(
+            'id', per_venue.c.id,
+            'name', per_venue.c.name,
+            'num_upcoming_shows', per_venue.c.num_upcoming_shows))
+
+    areas = db.session.query(
+        per_venue.c.city,
+        per_venue.c.state,
+        venues.label('venues')).\
+        group_by(per_venue.c.city, per_venue.c.state).\
+        order_by(per_venue.c.state, per_venue.c.city).\
+        all()
+
+    return [{
+        "city": area.city,
+        "state": area.state,
+        "venues": area.venues if isinstance(area.venues, list)
+        else json.loads(area.venues)
+    } for area in areas]
+
+
 @app.route('/venues/search', methods=['POST'])
 def search_venues():
     # TO/DO: implement search on artists with partial string search.
@@ -102,13 +153,10 @@ def search_venues():
 
     search_term = request.form.get('search_term', '')
     search = "%{}%".format(search_term)
-    venues = Venue.query.filter(Venue.name.ilike(search)).all()
-    matched_venues = []
-    for venue in venues:
-        matched_venues.append({
-            "id": venue.id,
-            "name": venue.name,
-        })
+    # select only the rendered columns as plain rows, not Venue entities
+    venues = db.session.query(Venue.id, Venue.name).\
+        filter(Venue.name.ilike(search)).all()
+    matched_venues = [venue._asdict() for venue in venues]
 
     response = {
         "count": len(venues),
@@ -129,42 +177,42 @@ def show_venue(venue_id):
     # show_venue = Venue.query.get_or_404(venue_id)
     # data = vars(show_venue)
 
-    show_venue = Venue.query.get_or_404(venue_id)
-
-    past_shows = db.session.query(Artist, Show).join(Show).join(Venue).\
-        filter(
-            Show.venue_id == venue_id,
-            Show.artist_id == Artist.id,
-            Show.start_time < datetime.now()
-    ).\
-        all()
-
-    upcoming_shows = db.session.query(Artist, Show).join(Show).join(Venue).\
-        filter(
-            Show.venue_id == venue_id,
-            Show.artist_id == Artist.id,
-            Show.start_time > datetime.now()
-    ).\
+    # one round trip: the venue with its shows and their artists,
+    # partitioned into past/upcoming against a single `now`
+    now = datetime.now()
+    rows = db.session.query(
+        Venue,
+        Show.start_time,
+        Artist.id.label('artist_id'),
+        Artist.name.label('artist_name'),
+        Artist.image_link.label('artist_image_link')).\
+        outerjoin(Show, Show.venue_id == Venue.id).\
+        outerjoin(Artist, Artist.id == Show.artist_id).\
+        filter(Venue.id == venue_id).\
+        order_by(Show.start_time).\
         all()
 
-    data = vars(show_venue)
-
-    data['past_shows'] = [{
-        'artist_id': artist.id,
-        "artist_name": artist.name,
-        "artist_image_link": artist.image_link,
-        "start_time": show.start_time.strftime("%m/%d/%Y, %H:%M")
-    } for artist, show in past_shows]
-
-    data['upcoming_shows'] = [{
-        'artist_id': artist.id,
-        'artist_name': artist.name,
-        'artist_image_link': artist.image_link,
-        'start_time': show.start_time.strftime("%m/%d/%Y, %H:%M")
-    } for artist, show in upcoming_shows]
+    if not rows:
+        abort(404)
+
+    data = vars(rows[0].Venue)
+    data['past_shows'] = []
+    data['upcoming_shows'] = []
+
+    for row in rows:
+        if row.start_time is None or row.start_time == now:
+            continue
+        shows = data['past_shows'] if row.start_time < now \
+            else data['upcoming_shows']
+        shows.append({
+            'artist_id': row.artist_id,
+            'artist_name': row.artist_name,
+            'artist_image_link': row.artist_image_link,
+            'start_time': row.start_time.strftime("%m/%d/%Y, %H:%M")
+        })
 
-    data['past_shows_count'] = len(past_shows)
-    data['upcoming_shows_count'] = len(upcoming_shows)
+    data['past_shows_count'] = len(data['past_shows'])
+    data['upcoming_shows_count'] = len(data['upcoming_shows'])
 
     return render_template('pages/show_venue.html', venue=data)
 
@@ -257,13 +305,8 @@ def delete_venue(venue_id):
 def artists():
     # TO/DO: replace with real data returned from querying the database
 
-    artists = Artist.query.all()
-    data = []
-    for artist in artists:
-        data.append({
-            "id": artist.id,
-            "name": artist.name,
-        })
+    artists = db.session.query(Artist.id, Artist.name).order_by(Artist.id).all()
+    data = [artist._asdict() for artist in artists]
 
     return render_template('pages/artists.html', artists=data)
 
@@ -278,13 +321,9 @@ def search_artists():
 
     search_term = request.form.get('search_term', '')
     search = "%{}%".format(search_term)
-    artists = Artist.query.filter(Artist.name.ilike(search)).all()
-    matched_artists = []
-    for artist in artists:
-        matched_artists.append({
-            "id": artist.id,
-            "name": artist.name,
-        })
+    artists = db.session.query(Artist.id, Artist.name).\
+        filter(Artist.name.ilike(search)).all()
+    matched_artists = [artist._asdict() for artist in artists]
 
     response = {
         "count": len(artists),
@@ -306,42 +345,42 @@ def show_artist(artist_id):
     # show_artist = Artist.query.get_or_404(artist_id)
     # data = vars(show_artist)
 
-    show_artist = Artist.query.get_or_404(artist_id)
-
-    past_shows = db.session.query(Venue, Show).join(Show).join(Artist).\
-        filter(
-            Show.venue_id == Venue.id,
-            Show.artist_id == artist_id,
-            Show.start_time < datetime.now()
-    ).\
-        all()
-
-    upcoming_shows = db.session.query(Venue, Show).join(Show).join(Artist).\
-        filter(
-            Show.venue_id == Venue.id,
-            Show.artist_id == artist_id,
-            Show.start_time > datetime.now()
-    ).\
+    # one round trip: the artist with its shows and their venues,
+    # partitioned into past/upcoming against a single `now`
+    now = datetime.now()
+    rows = db.session.query(
+        Artist,
+        Show.start_time,
+        Venue.id.label('venue_id'),
+        Venue.name.label('venue_name'),
+        Venue.image_link.label('venue_image_link')).\
+        outerjoin(Show, Show.artist_id == Artist.id).\
+        outerjoin(Venue, Venue.id == Show.venue_id).\
+        filter(Artist.id == artist_id).\
+        order_by(Show.start_time).\
         all()
 
-    data = vars(show_artist)
-
-    data['past_shows'] = [{
-        'venue_id': venue.id,
-        "venue_name": venue.name,
-        "venue_image_link": venue.image_link,
-        "start_time": show.start_time.strftime("%m/%d/%Y, %H:%M")
-    } for venue, show in past_shows]
-
-    data['upcoming_shows'] = [{
-        'venue_id': venue.id,
-        "venue_name": venue.name,
-        "venue_image_link": venue.image_link,
-        'start_time': show.start_time.strftime("%m/%d/%Y, %H:%M")
-    } for venue, show in upcoming_shows]
+    if not rows:
+        abort(404)
+
+    data = vars(rows[0].Artist)
+    data['past_shows'] = []
+    data['upcoming_shows'] = []
+
+    for row in rows:
+        if row.start_time is None or row.start_time == now:
+            continue
+        shows = data['past_shows'] if row.start_time < now \
+            else data['upcoming_shows']
+        shows.append({
+            'venue_id': row.venue_id,
+            'venue_name': row.venue_name,
+            'venue_image_link': row.venue_image_link,
+            'start_time': row.start_time.strftime("%m/%d/%Y, %H:%M")
+        })
 
-    data['past_shows_count'] = len(past_shows)
-    data['upcoming_shows_count'] = len(upcoming_shows)
+    data['past_shows_count'] = len(data['past_shows'])
+    data['upcoming_shows_count'] = len(data['upcoming_shows'])
 
     return render_template('pages/show_artist.html', artist=data)
 
@@ -396,6 +435,9 @@ def edit_artist_submission(artist_id):
     artist.seeking_description = request.form['seeking_description']
     artist.image_link = request.form['image_link']
     db.session.commit()
+    # pick up the new name and image in the /shows feed
+    feed.refresh(db.session, artist_id=artist_id)
+    db.session.commit()
     flash('Artist ' + request.form['name'] + ' was successfully updated!')
     db.session.close()
 
@@ -453,6 +495,8 @@ def edit_venue_submission(venue_id):
     venue.seeking_description = request.form['seeking_description']
     venue.image_link = request.form['image_link']
     db.session.commit()
+    feed.refresh(db.session, venue_id=venue_id)
+    db.session.commit()
     flash('Venue ' + request.form['name'] + ' was successfully updated!')
 
     return redirect(url_for('show_venue', venue_id=venue_id))
@@ -523,20 +567,26 @@ def shows():
     # displays list of shows at /shows
     # TO/DO: shows: replace with real venues data.
 
-    shows = db.session.query(Show, Artist, Venue).join(Artist).join(
-        Venue).filter(Show.start_time > datetime.now()).all()
+    # served from the UpcomingShow summary table, kept current by the
+    # write paths and `flask refresh-show-feed`
+    shows, next_cursor = feed.page(
+        db.session,
+        after=request.args.get('after'),
+        limit=app.config.get('SHOW_FEED_PAGE_SIZE', 50))
+
     data = []
     for show in shows:
         data.append({
-            "venue_id": show.Venue.id,
-            "venue_name": show.Venue.name,
-            "artist_id": show.Artist.id,
-            "artist_name": show.Artist.name,
-            "artist_image_link": show.Artist.image_link,
-            "start_time": show.Show.start_time.strftime("%m/%d/%Y, %H:%M"),
+            "venue_id": show.venue_id,
+            "venue_name": show.venue_name,
+            "artist_id": show.artist_id,
+            "artist_name": show.artist_name,
+            "artist_image_link": show.artist_image_link,
+            "start_time": show.start_time.strftime("%m/%d/%Y, %H:%M"),
         })
 
-        return render_template('pages/shows.html', shows=data)
+    return render_template(
+        'pages/shows.html', shows=data, next_cursor=next_cursor)
 
 
 @app.route('/shows/create')
@@ -564,6 +614,9 @@ def create_show_submission():
                 start_time=form.start_time.data)
             db.session.add(show)
             db.session.commit()
+            # copy the new show into the /shows feed
+            feed.add_show(db.session, show.id)
+            db.session.commit()
             # on successful db insert, flash success
             flash('Show was successfully listed!')
         except ():
@@ -589,6 +642,89 @@ def create_show_submission():
         return render_template('forms/new_show.html', form=form)
 
 
+def import_format(filename, content_type, requested=None):
+    if requested in ('csv', 'ndjson'):
+        return requested
+    if (filename or '').endswith(('.ndjson', '.jsonl')) or \
+            'json' in (content_type or ''):
+        return 'ndjson'
+    return 'csv'
+
+
+def import_shows(lines, fmt):
+    # Core inserts skip the session hooks, so refresh the /venues cache
+    # and the /shows feed by hand; batches are committed as they go, so
+    # this also runs when the stream fails part way through
+    last_id = db.session.scalar(db.select(db.func.max(Show.id)))
+    try:
+        return bulk.import_shows(
+            db.session, lines, fmt,
+            batch_size=app.config.get('SHOW_IMPORT_BATCH_SIZE', 1000))
+    finally:
+        db.session.rollback()
+        feed.add_shows_after(db.session, last_id)
+        db.session.commit()
+        venues_cache.clear()
+
+
+@app.route('/shows/import', methods=['POST'])
+def import_shows_submission():
+    # bulk import of shows from a CSV or NDJSON body or file upload,
+    # rows are streamed, invalid ones are reported instead of aborting
+    upload = request.files.get('file')
+    if upload is not None:
+        stream, filename, content_type = \
+            upload.stream, upload.filename, upload.mimetype
+    else:
+        stream, filename, content_type = \
+            request.stream, None, request.mimetype
+
+    fmt = import_format(filename, content_type, request.args.get('format'))
+    try:
+        report = import_shows(codecs.iterdecode(stream, 'utf-8'), fmt)
+    except UnicodeDecodeError:
+        # the batches before the bad bytes stay imported
+        return jsonify({
+            'success': False,
+            'error': 400,
+            'message': 'the import is not valid UTF-8'
+        }), 400
+    finally:
+        db.session.close()
+
+    return jsonify({
+        'success': True,
+        'inserted': report['inserted'],
+        'failed': report['failed'],
+        'errors': report['errors']
+    })
+
+
+@app.cli.command('import-shows')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']),
+              default=None, help='defaults to the file extension')
+def import_shows_command(path, fmt):
+    '''Bulk import shows from a CSV or NDJSON file.'''
+    with open(path, newline='', encoding='utf-8') as lines:
+        report = import_shows(lines, import_format(path, None, fmt))
+    db.session.close()
+
+    for error in report['errors']:
+        click.echo('row {}: {}'.format(error['row'], error['error']), err=True)
+    click.echo('{} shows imported, {} rows rejected'.format(
+        report['inserted'], report['failed']))
+
+
+@app.cli.command('refresh-show-feed')
+def refresh_show_feed_command():
+    '''Drop past shows from the /shows feed and resync the upcoming ones.'''
+    feed.refresh(db.session)
+    db.session.commit()
+    db.session.close()
+    click.echo('show feed refreshed')
+
+
 @app.errorhandler(400)
 def bad_request_error(error):
     return render_template('errors/400.html'), 400
@@ -0,0 +1,120 @@
+import csv
+import io
+import json
+import dateutil.parser
+from sqlalchemy import insert, select
+
+from models import Artist, Show, Venue
+
+
+'''
+Bulk show import from CSV or NDJSON.
+
+    rows need venue_id, artist_id and start_time
+    venue and artist ids are checked against id sets loaded once up front
+    valid rows are inserted batch_size at a time, with COPY on Postgres
+    and an executemany INSERT elsewhere, and committed per batch
+    invalid rows are reported and skipped, they never abort the import
+'''
+
+MAX_REPORTED_ERRORS = 1000
+
+
+def parse_rows(stream, fmt):
+    '''
+    yields (row number, record) from a text stream
+    '''
+    if fmt == 'csv':
+        for number, record in enumerate(csv.DictReader(stream), start=2):
+            yield number, record
+        return
+
+    for number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield number, record
+
+
+def _validate(record, venue_ids, artist_ids):
+    if not isinstance(record, dict):
+        raise ValueError('row is not an object')
+    try:
+        venue_id = int(record['venue_id'])
+        artist_id = int(record['artist_id'])
+        start_time = dateutil.parser.parse(str(record['start_time']))
+    except KeyError as e:
+        raise ValueError('missing {}'.format(e.args[0]))
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError('invalid venue_id, artist_id or start_time')
+
+    if venue_id not in venue_ids:
+        raise ValueError('unknown venue_id {}'.format(venue_id))
+    if artist_id not in artist_ids:
+        raise ValueError('unknown artist_id {}'.format(artist_id))
+
+    return {
+        'venue_id': venue_id,
+        'artist_id': artist_id,
+        'start_time': start_time
+    }
+
+
+def _copy(session, batch):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in batch:
+        writer.writerow(
+            [row['venue_id'], row['artist_id'], row['start_time'].isoformat()])
+    buffer.seek(0)
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            'COPY "Show" (venue_id, artist_id, start_time) '
+            'FROM STDIN WITH (FORMAT csv)', buffer)
+    finally:
+        cursor.close()
+
+
+def _insert(session, batch):
+    if session.get_bind().dialect.name == 'postgresql':
+        _copy(session, batch)
+    else:
+        session.execute(insert(Show), batch)
+    session.commit()
+    return len(batch)
+
+
+def import_shows(session, stream, fmt='csv', batch_size=1000):
+    '''
+    returns {'inserted', 'failed', 'errors'} where errors lists
+    up to MAX_REPORTED_ERRORS {'row', 'error'} entries
+    '''
+    venue_ids = set(session.scalars(select(Venue.id)))
+    artist_ids = set(session.scalars(select(Artist.id)))
+
+    inserted = 0
+    failed = 0
+    errors = []
+    batch = []
+    for number, record in parse_rows(stream, fmt):
+        try:
+            batch.append(_validate(record, venue_ids, artist_ids))
+        except ValueError as e:
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({'row': number, 'error': str(e)})
+            continue
+
+        if len(batch) >= batch_size:
+            inserted += _insert(session, batch)
+            batch = []
+
+    if batch:
+        inserted += _insert(session, batch)
+
+    return {'inserted': inserted, 'failed': failed, 'errors': errors}
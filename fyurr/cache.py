@@ -0,0 +1,58 @@
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class TTLCache:
+    '''
+    TTLCache
+    a small in-process cache whose entries expire after `ttl` seconds
+    '''
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+'''
+clear_on_commit(cache, *models)
+    clears cache after any commit that inserted, updated or deleted
+    an instance of one of models
+'''
+def clear_on_commit(cache, *models):
+    flag = ('clear_on_commit', id(cache))
+
+    @event.listens_for(Session, 'after_flush')
+    def mark_dirty(session, flush_context):
+        changed = set(session.new) | set(session.dirty) | set(session.deleted)
+        if any(isinstance(instance, models) for instance in changed):
+            session.info[flag] = True
+
+    @event.listens_for(Session, 'after_commit')
+    def clear(session):
+        if session.info.pop(flag, False):
+            cache.clear()
+
+    @event.listens_for(Session, 'after_rollback')
+    def forget(session):
+        session.info.pop(flag, None)
@@ -0,0 +1,123 @@
+from datetime import datetime
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import Artist, Show, UpcomingShow, Venue
+
+
+'''
+The /shows feed, served from the UpcomingShow summary table.
+
+    add_show() copies one new show into the feed right after it is committed,
+        add_shows_after() does the same for the rows of a bulk import
+    refresh() drops past shows and upserts the upcoming ones, all of them or
+        one edited artist's or venue's, so renames are picked up
+    rows are written with INSERT .. ON CONFLICT (show_id) DO UPDATE, so
+        concurrent writers never collide on a show; full refreshes belong to
+        cron (`flask refresh-show-feed`), never to the read path
+    page() reads one keyset page ordered by (start_time, show_id)
+'''
+
+FEED_COLUMNS = [
+    UpcomingShow.show_id,
+    UpcomingShow.start_time,
+    UpcomingShow.venue_id,
+    UpcomingShow.venue_name,
+    UpcomingShow.artist_id,
+    UpcomingShow.artist_name,
+    UpcomingShow.artist_image_link,
+]
+
+# pg_advisory_xact_lock key that serialises refreshes across processes
+REFRESH_LOCK = 7140512
+
+UPSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def _upcoming(now):
+    return select(
+        Show.id,
+        Show.start_time,
+        Venue.id,
+        Venue.name,
+        Artist.id,
+        Artist.name,
+        Artist.image_link).\
+        join(Venue, Venue.id == Show.venue_id).\
+        join(Artist, Artist.id == Show.artist_id).\
+        where(Show.start_time > now)
+
+
+def _upsert(session, upcoming):
+    upsert = UPSERTS[session.get_bind().dialect.name](UpcomingShow)
+    statement = upsert.from_select(
+        [column.key for column in FEED_COLUMNS], upcoming)
+    session.execute(statement.on_conflict_do_update(
+        index_elements=[UpcomingShow.show_id],
+        set_={column.key: statement.excluded[column.key]
+              for column in FEED_COLUMNS[1:]}))
+
+
+def add_show(session, show_id, now=None):
+    _upsert(session,
+            _upcoming(now or datetime.now()).where(Show.id == show_id))
+
+
+def add_shows_after(session, show_id, now=None):
+    '''
+    copies the shows with an id above show_id, e.g. the highest id before
+    a bulk import
+    '''
+    upcoming = _upcoming(now or datetime.now())
+    if show_id is not None:
+        upcoming = upcoming.where(Show.id > show_id)
+    _upsert(session, upcoming)
+
+
+def refresh(session, now=None, artist_id=None, venue_id=None):
+    now = now or datetime.now()
+    if session.get_bind().dialect.name == 'postgresql':
+        session.execute(select(func.pg_advisory_xact_lock(REFRESH_LOCK)))
+    session.execute(
+        delete(UpcomingShow).where(UpcomingShow.start_time <= now))
+
+    upcoming = _upcoming(now)
+    if artist_id is not None:
+        upcoming = upcoming.where(Show.artist_id == artist_id)
+    if venue_id is not None:
+        upcoming = upcoming.where(Show.venue_id == venue_id)
+    _upsert(session, upcoming)
+
+
+def encode_cursor(row):
+    return '{}_{}'.format(row.start_time.isoformat(), row.show_id)
+
+
+def decode_cursor(cursor):
+    try:
+        start_time, show_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(start_time), int(show_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def page(session, after=None, limit=50, now=None):
+    '''
+    returns (rows, next_cursor) for the upcoming shows after the cursor
+    '''
+    query = select(*FEED_COLUMNS).\
+        where(UpcomingShow.start_time > (now or datetime.now()))
+    position = decode_cursor(after) if after else None
+    if position is not None:
+        query = query.where(
+            tuple_(UpcomingShow.start_time, UpcomingShow.show_id) >
+            tuple_(*position))
+    rows = session.execute(
+        query.order_by(UpcomingShow.start_time, UpcomingShow.show_id).
+        limit(limit + 1)).all()
+
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
@@ -0,0 +1,28 @@
+"""index venue areas and per-venue show times
+
+Revision ID: 5c9f2b7d3e11
+Revises: a8ad1577f51f
+Create Date: 2026-10-18 13:05:44.910532
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c9f2b7d3e11'
+down_revision = 'a8ad1577f51f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_Show_venue_id_start_time', 'Show',
+                    ['venue_id', 'start_time'], unique=False)
+    op.create_index('ix_Venue_state_city', 'Venue',
+                    ['state', 'city'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_Venue_state_city', table_name='Venue')
+    op.drop_index('ix_Show_venue_id_start_time', table_name='Show')
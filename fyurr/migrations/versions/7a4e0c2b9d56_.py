@@ -0,0 +1,47 @@
+"""upcoming shows feed table
+
+Revision ID: 7a4e0c2b9d56
+Revises: 5c9f2b7d3e11
+Create Date: 2026-10-18 14:21:09.337104
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a4e0c2b9d56'
+down_revision = '5c9f2b7d3e11'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('UpcomingShow',
+    sa.Column('show_id', sa.Integer(), nullable=False),
+    sa.Column('start_time', sa.DateTime(), nullable=False),
+    sa.Column('venue_id', sa.Integer(), nullable=False),
+    sa.Column('venue_name', sa.String(), nullable=True),
+    sa.Column('artist_id', sa.Integer(), nullable=False),
+    sa.Column('artist_name', sa.String(), nullable=True),
+    sa.Column('artist_image_link', sa.String(length=500), nullable=True),
+    sa.ForeignKeyConstraint(['show_id'], ['Show.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('show_id')
+    )
+    op.create_index('ix_UpcomingShow_start_time_show_id', 'UpcomingShow',
+                    ['start_time', 'show_id'], unique=False)
+    op.execute('''
+        INSERT INTO "UpcomingShow"
+            (show_id, start_time, venue_id, venue_name,
+             artist_id, artist_name, artist_image_link)
+        SELECT s.id, s.start_time, v.id, v.name, a.id, a.name, a.image_link
+        FROM "Show" s
+        JOIN "Venue" v ON v.id = s.venue_id
+        JOIN "Artist" a ON a.id = s.artist_id
+        WHERE s.start_time > now()
+    ''')
+
+
+def downgrade():
+    op.drop_index('ix_UpcomingShow_start_time_show_id', table_name='UpcomingShow')
+    op.drop_table('UpcomingShow')
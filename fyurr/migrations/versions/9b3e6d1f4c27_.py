@@ -0,0 +1,25 @@
+"""index per-artist show times
+
+Revision ID: 9b3e6d1f4c27
+Revises: 7a4e0c2b9d56
+Create Date: 2026-10-18 15:06:51.208337
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b3e6d1f4c27'
+down_revision = '7a4e0c2b9d56'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_Show_artist_id_start_time', 'Show',
+                    ['artist_id', 'start_time'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_Show_artist_id_start_time', table_name='Show')
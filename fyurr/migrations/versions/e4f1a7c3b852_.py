@@ -0,0 +1,26 @@
+"""index show times
+
+Revision ID: e4f1a7c3b852
+Revises: 9b3e6d1f4c27
+Create Date: 2026-10-18 20:52:37.604118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4f1a7c3b852'
+down_revision = '9b3e6d1f4c27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # the /venues listing counts upcoming shows across all venues, a range
+    # on start_time alone that the per-venue indexes cannot serve
+    op.create_index('ix_Show_start_time', 'Show', ['start_time'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_Show_start_time', table_name='Show')
@@ -1,9 +1,14 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from fsnd_db import RoutingSession
 
 
-db = SQLAlchemy()
+# reads may be sent to a replica, see ReplicaRouter in app.py
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+# a json list where there are no arrays (the SQLite test database)
+GENRES = db.ARRAY(db.String()).with_variant(db.JSON, 'sqlite')
 
 
 class Venue(db.Model):
@@ -20,12 +25,17 @@ class Venue(db.Model):
 
     # TO/DO: implement any missing fields,
     # as a database migration using Flask-Migrate
-    genres = db.Column(db.ARRAY(db.String()))
+    genres = db.Column(GENRES)
     website = db.Column(db.String(120))
     seeking_talent = db.Column(db.Boolean)
     seeking_description = db.Column(db.String(120))
-    shows = db.relationship('Show', backref='Venue',
-                            lazy='joined', cascade="all, delete")
+    # relationships never load on attribute access: a query that needs
+    # them opts in with selectinload()/joinedload()
+    shows = db.relationship('Show', back_populates='venue',
+                            lazy='raise_on_sql', cascade="all, delete")
+    __table_args__ = (
+        db.Index('ix_Venue_state_city', 'state', 'city'),
+    )
 
 
 class Artist(db.Model):
@@ -36,7 +46,7 @@ class Artist(db.Model):
     city = db.Column(db.String(120))
     state = db.Column(db.String(120))
     phone = db.Column(db.String(120))
-    genres = db.Column(db.ARRAY(db.String()))
+    genres = db.Column(GENRES)
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
 
@@ -45,8 +55,8 @@ class Artist(db.Model):
     website = db.Column(db.String(120))
     seeking_venue = db.Column(db.Boolean)
     seeking_description = db.Column(db.String(120))
-    shows = db.relationship('Show', backref='Artist',
-                            lazy='joined', cascade="all, delete")
+    shows = db.relationship('Show', back_populates='artist',
+                            lazy='raise_on_sql', cascade="all, delete")
 
 
 # TO/DO: Implement Show and Artist models,
@@ -60,5 +70,38 @@ class Show(db.Model):
     artist_id = db.Column(db.Integer, db.ForeignKey(
         'Artist.id'), nullable=False)
     start_time = db.Column(db.DateTime)
-    venue = db.relationship('Venue', backref='Show', lazy=True)
-    artist = db.relationship('Artist', backref='Show', lazy=True)
+    # per-venue and per-artist show times, and upcoming shows overall
+    # (see migrations 5c9f2b7d3e11, 9b3e6d1f4c27 and e4f1a7c3b852)
+    __table_args__ = (
+        db.Index('ix_Show_venue_id_start_time', 'venue_id', 'start_time'),
+        db.Index('ix_Show_artist_id_start_time', 'artist_id', 'start_time'),
+        db.Index('ix_Show_start_time', 'start_time'),
+    )
+    venue = db.relationship('Venue', back_populates='shows',
+                            lazy='raise_on_sql')
+    artist = db.relationship('Artist', back_populates='shows',
+                             lazy='raise_on_sql')
+
+
+class UpcomingShow(db.Model):
+    '''
+    UpcomingShow
+    denormalised copy of upcoming Show rows with their artist and venue,
+    read by the /shows feed and maintained by feed.py
+    '''
+    __tablename__ = 'UpcomingShow'
+
+    show_id = db.Column(db.Integer,
+                        db.ForeignKey('Show.id', ondelete='CASCADE'),
+                        primary_key=True)
+    start_time = db.Column(db.DateTime, nullable=False)
+    venue_id = db.Column(db.Integer, nullable=False)
+    venue_name = db.Column(db.String)
+    artist_id = db.Column(db.Integer, nullable=False)
+    artist_name = db.Column(db.String)
+    artist_image_link = db.Column(db.String(500))
+    # keyset order of the feed (see migration 7a4e0c2b9d56)
+    __table_args__ = (
+        db.Index('ix_UpcomingShow_start_time_show_id',
+                 'start_time', 'show_id'),
+    )
@@ -0,0 +1,218 @@
+import csv
+import io
+import json
+import os
+import time
+import dateutil.parser
+from sqlalchemy import insert, select
+
+from models import Animal, Institution, Specimen
+
+
+'''
+Streaming specimen ingestion for partner dumps (CSV or NDJSON).
+
+    rows need animal_id, institution_id and sightingdate
+    animal and institution ids are checked against id sets loaded once up front
+    valid rows are inserted batch_size at a time, with COPY on Postgres and a
+        chunked executemany INSERT elsewhere, one commit per batch
+    after every commit the number of source rows consumed is written to the
+        checkpoint file, a rerun with the same checkpoint skips those rows
+        (a crash between a commit and its checkpoint write repeats that one batch)
+'''
+
+def source_format(path, requested=None):
+    if requested in ('csv', 'ndjson'):
+        return requested
+    if path.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return 'csv'
+
+
+def read_rows(lines, fmt):
+    '''
+    yields one record per source row, None for rows that are not parseable
+    '''
+    if fmt == 'csv':
+        yield from csv.DictReader(lines)
+        return
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def _validate(record, animal_ids, institution_ids):
+    if not isinstance(record, dict):
+        raise ValueError('row is not an object')
+    try:
+        animal_id = int(record['animal_id'])
+        institution_id = int(record['institution_id'])
+        sightingdate = dateutil.parser.parse(str(record['sightingdate']))
+    except KeyError as e:
+        raise ValueError('missing {}'.format(e.args[0]))
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError('invalid animal_id, institution_id or sightingdate')
+
+    if animal_id not in animal_ids:
+        raise ValueError('unknown animal_id {}'.format(animal_id))
+    if institution_id not in institution_ids:
+        raise ValueError('unknown institution_id {}'.format(institution_id))
+
+    return {
+        'animal_id': animal_id,
+        'institution_id': institution_id,
+        'sightingdate': sightingdate
+    }
+
+
+def _copy(session, batch):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in batch:
+        writer.writerow([
+            row['animal_id'],
+            row['institution_id'],
+            row['sightingdate'].isoformat()])
+    buffer.seek(0)
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            'COPY "Specimen" (animal_id, institution_id, sightingdate) '
+            'FROM STDIN WITH (FORMAT csv)', buffer)
+    finally:
+        cursor.close()
+
+
+def _insert(session, batch, chunk_size):
+    if session.get_bind().dialect.name == 'postgresql':
+        _copy(session, batch)
+    else:
+        for start in range(0, len(batch), chunk_size):
+            session.execute(insert(Specimen), batch[start:start + chunk_size])
+
+
+class Checkpoint:
+    '''
+    Checkpoint
+    progress of one source file, saved as json and replaced atomically
+    '''
+    def __init__(self, path, source):
+        self.path = path
+        self.source = os.path.abspath(source)
+        self.rows = 0
+        self.inserted = 0
+        self.failed = 0
+
+    @classmethod
+    def load(cls, path, source):
+        checkpoint = cls(path, source)
+        if path is None or not os.path.exists(path):
+            return checkpoint
+        with open(path) as f:
+            state = json.load(f)
+        if state.get('source') != checkpoint.source:
+            raise ValueError(
+                'checkpoint {} belongs to {}'.format(path, state.get('source')))
+        checkpoint.rows = state['rows']
+        checkpoint.inserted = state['inserted']
+        checkpoint.failed = state['failed']
+        return checkpoint
+
+    def save(self):
+        if self.path is None:
+            return
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({
+                'source': self.source,
+                'rows': self.rows,
+                'inserted': self.inserted,
+                'failed': self.failed
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+
+class Progress:
+    '''
+    Progress
+    running totals for one ingest run, rate counts rows read by this run only
+    '''
+    def __init__(self, checkpoint, skipped):
+        self.checkpoint = checkpoint
+        self.skipped = skipped
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self):
+        elapsed = self.elapsed
+        read = self.checkpoint.rows - self.skipped
+        return read / elapsed if elapsed > 0 else 0.0
+
+    def __str__(self):
+        return '{} rows, {} inserted, {} rejected, {:.0f} rows/s'.format(
+            self.checkpoint.rows, self.checkpoint.inserted,
+            self.checkpoint.failed, self.rate)
+
+
+'''
+ingest(session, path, fmt=None, checkpoint_path=None, batch_size=5000,
+       chunk_size=1000, on_batch=None, on_reject=None)
+    streams the file at path into Specimen and returns the final Progress
+    on_batch(progress) is called after every committed batch
+    on_reject(row_number, record, message) is called for every rejected row
+'''
+def ingest(session, path, fmt=None, checkpoint_path=None, batch_size=5000,
+           chunk_size=1000, on_batch=None, on_reject=None):
+    checkpoint = Checkpoint.load(checkpoint_path, path)
+    progress = Progress(checkpoint, skipped=checkpoint.rows)
+
+    animal_ids = set(session.scalars(select(Animal.id)))
+    institution_ids = set(session.scalars(select(Institution.id)))
+
+    def commit(batch, rows, failed):
+        if batch:
+            _insert(session, batch, chunk_size)
+            session.commit()
+        checkpoint.rows = rows
+        checkpoint.inserted += len(batch)
+        checkpoint.failed += failed
+        checkpoint.save()
+        if on_batch is not None:
+            on_batch(progress)
+
+    with open(path, newline='', encoding='utf-8') as lines:
+        batch = []
+        failed = 0
+        rows = 0
+        for record in read_rows(lines, source_format(path, fmt)):
+            rows += 1
+            if rows <= checkpoint.rows:
+                continue
+            try:
+                batch.append(_validate(record, animal_ids, institution_ids))
+            except ValueError as e:
+                failed += 1
+                if on_reject is not None:
+                    on_reject(rows, record, str(e))
+
+            if len(batch) + failed >= batch_size:
+                commit(batch, rows, failed)
+                batch = []
+                failed = 0
+
+        if rows > checkpoint.rows:
+            commit(batch, rows, failed)
+
+    return progress
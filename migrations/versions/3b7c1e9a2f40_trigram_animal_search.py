@@ -0,0 +1,33 @@
+"""trigram indexes for animal search
+
+Revision ID: 3b7c1e9a2f40
+Revises: 15d3505700b5
+Create Date: 2026-10-18 10:12:31.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7c1e9a2f40'
+down_revision = '15d3505700b5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # GIN trigram indexes let ILIKE '%term%' and similarity ranking
+    # on genus/species use an index instead of a sequential scan
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_Animal_genus_trgm', 'Animal', ['genus'],
+                    postgresql_using='gin',
+                    postgresql_ops={'genus': 'gin_trgm_ops'})
+    op.create_index('ix_Animal_species_trgm', 'Animal', ['species'],
+                    postgresql_using='gin',
+                    postgresql_ops={'species': 'gin_trgm_ops'})
+
+
+def downgrade():
+    op.drop_index('ix_Animal_species_trgm', table_name='Animal')
+    op.drop_index('ix_Animal_genus_trgm', table_name='Animal')
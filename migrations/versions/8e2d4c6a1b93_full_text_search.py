@@ -0,0 +1,44 @@
+"""full text search vectors for animals and institutions
+
+Revision ID: 8e2d4c6a1b93
+Revises: 3b7c1e9a2f40
+Create Date: 2026-10-18 11:40:07.218845
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e2d4c6a1b93'
+down_revision = '3b7c1e9a2f40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # generated columns keep the vectors in step with every insert/update,
+    # the GIN indexes serve the @@ matches in search.py
+    op.execute('''
+        ALTER TABLE "Animal" ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            to_tsvector('simple', coalesce(genus, '') || ' ' || coalesce(species, ''))
+        ) STORED
+    ''')
+    op.execute('''
+        ALTER TABLE "Institution" ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            to_tsvector('simple', coalesce(name, ''))
+        ) STORED
+    ''')
+    op.create_index('ix_Animal_search_vector', 'Animal', ['search_vector'],
+                    postgresql_using='gin')
+    op.create_index('ix_Institution_search_vector', 'Institution',
+                    ['search_vector'], postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('ix_Institution_search_vector', table_name='Institution')
+    op.drop_index('ix_Animal_search_vector', table_name='Animal')
+    op.drop_column('Institution', 'search_vector')
+    op.drop_column('Animal', 'search_vector')
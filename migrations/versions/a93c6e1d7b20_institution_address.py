@@ -0,0 +1,34 @@
+"""add the Institution.address column the model already declares
+
+Revision ID: a93c6e1d7b20
+Revises: f6a0b2d8c953
+Create Date: 2026-10-18 20:41:09.318254
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a93c6e1d7b20'
+down_revision = 'f6a0b2d8c953'
+branch_labels = None
+depends_on = None
+
+
+def _has_address():
+    columns = sa.inspect(op.get_bind()).get_columns('Institution')
+    return any(column['name'] == 'address' for column in columns)
+
+
+def upgrade():
+    # no earlier migration adds it, databases created with create_all()
+    # already have it
+    if not _has_address():
+        op.add_column('Institution',
+                      sa.Column('address', sa.String(length=120), nullable=True))
+
+
+def downgrade():
+    if _has_address():
+        op.drop_column('Institution', 'address')
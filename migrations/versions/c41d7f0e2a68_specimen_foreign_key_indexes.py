@@ -0,0 +1,31 @@
+"""index specimen foreign keys with sighting dates
+
+Revision ID: c41d7f0e2a68
+Revises: 8e2d4c6a1b93
+Create Date: 2026-10-18 15:02:18.664019
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d7f0e2a68'
+down_revision = '8e2d4c6a1b93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # the foreign keys had no indexes, so every animal/institution page
+    # and joinedload scanned Specimen; sightingdate rides along for ordering
+    op.create_index('ix_Specimen_animal_id_sightingdate', 'Specimen',
+                    ['animal_id', 'sightingdate'], unique=False)
+    op.create_index('ix_Specimen_institution_id_sightingdate', 'Specimen',
+                    ['institution_id', 'sightingdate'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_Specimen_institution_id_sightingdate',
+                  table_name='Specimen')
+    op.drop_index('ix_Specimen_animal_id_sightingdate', table_name='Specimen')
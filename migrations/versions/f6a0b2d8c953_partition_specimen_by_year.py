@@ -0,0 +1,100 @@
+"""range partition specimens by sighting year
+
+Revision ID: f6a0b2d8c953
+Revises: c41d7f0e2a68
+Create Date: 2026-10-18 15:48:36.120774
+
+"""
+import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6a0b2d8c953'
+down_revision = 'c41d7f0e2a68'
+branch_labels = None
+depends_on = None
+
+# partitions are created up to this many years past the current one,
+# later ones come from `flask create-specimen-partitions`
+YEARS_AHEAD = 2
+
+INDEXES = [
+    ('ix_Specimen_animal_id_sightingdate', ['animal_id', 'sightingdate']),
+    ('ix_Specimen_institution_id_sightingdate',
+     ['institution_id', 'sightingdate']),
+]
+
+
+def _swap(create_sql, partition_years=()):
+    # build the new table next to the old one, copy the rows over,
+    # then hand it the old name, sequence and indexes
+    op.execute(create_sql)
+    for year in partition_years:
+        op.execute('''
+            CREATE TABLE "Specimen_y{year}" PARTITION OF "Specimen_new"
+            FOR VALUES FROM ('{year}-01-01') TO ('{next}-01-01')
+        '''.format(year=year, next=year + 1))
+    if partition_years:
+        op.execute(
+            'CREATE TABLE "Specimen_default" PARTITION OF "Specimen_new" DEFAULT')
+    op.execute('''
+        INSERT INTO "Specimen_new" (id, animal_id, institution_id, sightingdate)
+        SELECT id, animal_id, institution_id, sightingdate FROM "Specimen"
+    ''')
+    op.execute('ALTER SEQUENCE "Specimen_id_seq" OWNED BY "Specimen_new".id')
+    op.drop_table('Specimen')
+    op.rename_table('Specimen_new', 'Specimen')
+    op.execute(
+        'ALTER TABLE "Specimen" RENAME CONSTRAINT "Specimen_new_pkey" TO "Specimen_pkey"')
+    for name, columns in INDEXES:
+        op.create_index(name, 'Specimen', columns, unique=False)
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # one partition per year that already has sightings, through YEARS_AHEAD
+    # years from now; the default partition catches anything outside them.
+    # the partition key has to be part of the primary key
+    first, last = op.get_bind().execute(sa.text(
+        'SELECT min(extract(year FROM sightingdate))::int, '
+        'max(extract(year FROM sightingdate))::int FROM "Specimen"')).one()
+    this_year = datetime.date.today().year
+    years = range(min(first or this_year, this_year),
+                  max(last or this_year, this_year + YEARS_AHEAD) + 1)
+
+    _swap('''
+        CREATE TABLE "Specimen_new" (
+            id integer NOT NULL DEFAULT nextval('"Specimen_id_seq"'),
+            animal_id integer NOT NULL,
+            institution_id integer NOT NULL,
+            sightingdate timestamp without time zone NOT NULL,
+            CONSTRAINT "Specimen_new_pkey" PRIMARY KEY (id, sightingdate),
+            CONSTRAINT "Specimen_animal_id_fkey" FOREIGN KEY (animal_id)
+                REFERENCES "Animal" (id),
+            CONSTRAINT "Specimen_institution_id_fkey" FOREIGN KEY (institution_id)
+                REFERENCES "Institution" (id)
+        ) PARTITION BY RANGE (sightingdate)
+    ''', years)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    _swap('''
+        CREATE TABLE "Specimen_new" (
+            id integer NOT NULL DEFAULT nextval('"Specimen_id_seq"'),
+            animal_id integer NOT NULL,
+            institution_id integer NOT NULL,
+            sightingdate timestamp without time zone NOT NULL,
+            CONSTRAINT "Specimen_new_pkey" PRIMARY KEY (id),
+            CONSTRAINT "Specimen_animal_id_fkey" FOREIGN KEY (animal_id)
+                REFERENCES "Animal" (id),
+            CONSTRAINT "Specimen_institution_id_fkey" FOREIGN KEY (institution_id)
+                REFERENCES "Institution" (id)
+        )
+    ''')
@@ -3,10 +3,12 @@ import os
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from fsnd_db import RoutingSession
 
 
 app = Flask(__name__)
-db = SQLAlchemy()
+# reads may be sent to a replica, see ReplicaRouter in app.py
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate(app, db)
 
 
@@ -16,6 +18,13 @@ class Animal(db.Model):
     genus = db.Column(db.String(120))
     species = db.Column(db.String(120))
     specimens = db.relationship('Specimen', backref='animal', lazy=True)
+    # pg_trgm GIN indexes backing search_animals (see migration 3b7c1e9a2f40)
+    __table_args__ = (
+        db.Index('ix_Animal_genus_trgm', 'genus', postgresql_using='gin',
+                 postgresql_ops={'genus': 'gin_trgm_ops'}),
+        db.Index('ix_Animal_species_trgm', 'species', postgresql_using='gin',
+                 postgresql_ops={'species': 'gin_trgm_ops'}),
+    )
 
 class Institution(db.Model):
     __tablename__ = 'Institution'
@@ -31,7 +40,16 @@ class Specimen(db.Model):
                           ,nullable=False)
     institution_id = db.Column(db.Integer,db.ForeignKey('Institution.id')
                           ,nullable=False)
-    sightingdate = db.Column(db.DateTime)
+    # on Postgres the table is range partitioned by year on sightingdate and
+    # its primary key is (id, sightingdate), see migration f6a0b2d8c953;
+    # id alone still identifies a row, it comes from a single sequence
+    sightingdate = db.Column(db.DateTime, nullable=False)
+    __table_args__ = (
+        db.Index('ix_Specimen_animal_id_sightingdate',
+                 'animal_id', 'sightingdate'),
+        db.Index('ix_Specimen_institution_id_sightingdate',
+                 'institution_id', 'sightingdate'),
+    )
 
 # TODO update schema
 
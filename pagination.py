@@ -0,0 +1,103 @@
+from flask import current_app, request
+from sqlalchemy import text
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class Page:
+    '''
+    Page
+    one keyset (seek) page of a listing
+
+        items: the rows on this page, in ascending key order
+        next_cursor: pass as ?after= to get the following page, None on the last page
+        prev_cursor: pass as ?before= to get the preceding page, None on the first page
+        estimated_total: planner estimate of the table size, None if unavailable
+        filters: extra query args the pager links carry over (e.g. since/until)
+    '''
+    def __init__(self, items, limit, next_cursor=None, prev_cursor=None,
+                 estimated_total=None):
+        self.items = items
+        self.limit = limit
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.estimated_total = estimated_total
+        self.filters = {}
+
+
+'''
+page_args()
+    reads ?after=<id>, ?before=<id> and ?limit= from the current request
+'''
+def page_args():
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    return {
+        'after': request.args.get('after', type=int),
+        'before': request.args.get('before', type=int),
+        'limit': min(max(limit, 1), MAX_PAGE_SIZE)
+    }
+
+
+'''
+keyset_page(query, column, after=None, before=None, limit=DEFAULT_PAGE_SIZE)
+    returns a Page of query ordered by column (the primary key)
+    seeks with WHERE column > after (or < before) instead of OFFSET,
+    so every page costs one index range scan no matter how deep it is
+'''
+def keyset_page(query, column, after=None, before=None,
+                limit=DEFAULT_PAGE_SIZE):
+    def key(row):
+        return getattr(row, column.key)
+
+    if before is not None:
+        rows = query.filter(column < before).\
+            order_by(column.desc()).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit][::-1]
+        next_cursor = key(rows[-1]) if rows else None
+        prev_cursor = key(rows[0]) if rows and has_more else None
+    else:
+        if after is not None:
+            query = query.filter(column > after)
+        rows = query.order_by(column).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = key(rows[-1]) if rows and has_more else None
+        prev_cursor = key(rows[0]) if rows and after is not None else None
+
+    estimated_total = None
+    if current_app.config.get('ESTIMATE_PAGE_TOTALS', False):
+        estimated_total = estimated_count(query.session, column.table.name)
+
+    return Page(rows, limit, next_cursor, prev_cursor, estimated_total)
+
+
+'''
+estimated_count(session, table_name)
+    returns the planner's row estimate for table_name (pg_class.reltuples),
+    which is kept up to date by ANALYZE/autovacuum and costs a catalog lookup
+    instead of a COUNT(*) over the whole table
+    autovacuum never analyzes a partitioned table itself (e.g. "Specimen"),
+    so for those the estimates of its partitions are summed
+    returns None on other databases or before the table was first analyzed
+'''
+def estimated_count(session, table_name):
+    if session.get_bind().dialect.name != 'postgresql':
+        return None
+    estimate = session.execute(
+        text('''
+            SELECT CASE WHEN parent.relkind = 'p' THEN (
+                SELECT sum(child.reltuples) FILTER (WHERE child.reltuples >= 0)
+                FROM pg_inherits
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE pg_inherits.inhparent = parent.oid
+            ) ELSE parent.reltuples END::bigint
+            FROM pg_class parent
+            WHERE parent.oid = to_regclass(:name)
+        '''),
+        {'name': '"{}"'.format(table_name)}).scalar()
+    if estimate is None or estimate < 0:
+        return None
+    return estimate
@@ -0,0 +1,78 @@
+import datetime
+from sqlalchemy import text
+
+
+'''
+Yearly range partitions of "Specimen" on sightingdate (Postgres only).
+
+    "Specimen" is partitioned by migration f6a0b2d8c953, one "Specimen_y<year>"
+    table per year plus "Specimen_default" for anything outside them
+    ensure_partitions() creates the partitions for the coming years, run it
+    from cron through `flask create-specimen-partitions`; rows that already
+    landed in the default partition for a new year are moved across
+'''
+
+PARENT = 'Specimen'
+DEFAULT_PARTITION = 'Specimen_default'
+
+
+def partition_name(year):
+    return '{}_y{}'.format(PARENT, year)
+
+
+def existing_partitions(session):
+    rows = session.execute(text('''
+        SELECT child.relname FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :parent
+    '''), {'parent': PARENT})
+    return {row.relname for row in rows}
+
+
+def create_partition(session, year):
+    '''
+    creates the partition for year, moving any of its rows out of the
+    default partition first (attaching would fail while they are there)
+    '''
+    name = partition_name(year)
+    bounds = {
+        'start': datetime.datetime(year, 1, 1),
+        'end': datetime.datetime(year + 1, 1, 1)
+    }
+    session.execute(text(
+        'CREATE TABLE "{}" (LIKE "{}" INCLUDING DEFAULTS)'.format(name, PARENT)))
+    session.execute(text('''
+        WITH moved AS (
+            DELETE FROM "{default}"
+            WHERE sightingdate >= :start AND sightingdate < :end
+            RETURNING id, animal_id, institution_id, sightingdate
+        )
+        INSERT INTO "{name}" (id, animal_id, institution_id, sightingdate)
+        SELECT id, animal_id, institution_id, sightingdate FROM moved
+    '''.format(default=DEFAULT_PARTITION, name=name)), bounds)
+    session.execute(text('''
+        ALTER TABLE "{parent}" ATTACH PARTITION "{name}"
+        FOR VALUES FROM ('{start}') TO ('{end}')
+    '''.format(parent=PARENT, name=name,
+               start=bounds['start'].isoformat(), end=bounds['end'].isoformat())))
+    return name
+
+
+'''
+ensure_partitions(session, years_ahead=2, today=None)
+    creates any missing partitions from the current year through
+    years_ahead years from now and returns their names
+    does nothing on databases other than Postgres
+'''
+def ensure_partitions(session, years_ahead=2, today=None):
+    if session.get_bind().dialect.name != 'postgresql':
+        return []
+    first = (today or datetime.date.today()).year
+    existing = existing_partitions(session)
+    created = []
+    for year in range(first, first + years_ahead + 1):
+        if partition_name(year) not in existing:
+            created.append(create_partition(session, year))
+    session.commit()
+    return created
@@ -0,0 +1,179 @@
+import re
+from markupsafe import Markup, escape
+from sqlalchemy import bindparam, text
+from fsnd_db import use_primary
+
+
+'''
+Cross-entity full text search for animals, institutions and specimens.
+
+    Postgres: generated tsvector columns with GIN indexes on Animal and Institution
+        (migration 8e2d4c6a1b93), ranked with ts_rank, highlighted with ts_headline
+    SQLite: an FTS5 table kept in sync by triggers, created by ensure_sqlite_index(),
+        ranked with bm25, highlighted with highlight()
+
+    specimens have no text of their own, they match through their animal and institution
+'''
+
+# highlight markers, swapped for <mark> tags after the snippet is escaped
+START_SEL = '\x02'
+STOP_SEL = '\x03'
+
+POSTGRES_SEARCH = text('''
+    WITH q AS (SELECT to_tsquery('simple', :query) AS query),
+    hits AS (
+        SELECT 'animal' AS kind, a.id,
+               concat_ws(' ', a.genus, a.species) AS title,
+               ts_rank(a.search_vector, q.query) AS rank
+        FROM "Animal" a, q
+        WHERE a.search_vector @@ q.query
+        UNION ALL
+        SELECT 'institution', i.id, i.name, ts_rank(i.search_vector, q.query)
+        FROM "Institution" i, q
+        WHERE i.search_vector @@ q.query
+        UNION ALL
+        SELECT 'specimen', s.id,
+               concat_ws(' ', a.genus, a.species, i.name),
+               greatest(ts_rank(a.search_vector, q.query),
+                        ts_rank(i.search_vector, q.query))
+        FROM "Specimen" s
+        JOIN "Animal" a ON a.id = s.animal_id
+        JOIN "Institution" i ON i.id = s.institution_id, q
+        WHERE a.search_vector @@ q.query OR i.search_vector @@ q.query
+    ),
+    page AS (
+        SELECT * FROM hits
+        ORDER BY rank DESC, kind, id
+        LIMIT :limit OFFSET :offset
+    )
+    SELECT page.kind, page.id, page.rank,
+           ts_headline('simple', page.title, q.query, :headline_options) AS snippet
+    FROM page, q
+    ORDER BY page.rank DESC, page.kind, page.id
+''')
+
+SQLITE_SEARCH = text('''
+    WITH hits AS (
+        SELECT kind, ref_id AS id, -bm25(search_index) AS rank,
+               highlight(search_index, 2, :start_sel, :stop_sel) AS snippet
+        FROM search_index
+        WHERE search_index MATCH :query
+    )
+    SELECT kind, id, rank, snippet FROM hits
+    UNION ALL
+    SELECT 'specimen', s.id, max(h.rank), h.snippet
+    FROM "Specimen" s
+    JOIN hits h ON (h.kind = 'animal' AND h.id = s.animal_id)
+                OR (h.kind = 'institution' AND h.id = s.institution_id)
+    GROUP BY s.id
+    ORDER BY rank DESC, kind, id
+    LIMIT :limit OFFSET :offset
+''')
+
+SQLITE_INDEX = [
+    '''CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        kind UNINDEXED, ref_id UNINDEXED, title, tokenize='unicode61')''',
+    '''CREATE TRIGGER IF NOT EXISTS search_animal_insert AFTER INSERT ON "Animal" BEGIN
+        INSERT INTO search_index (kind, ref_id, title)
+        VALUES ('animal', new.id, trim(coalesce(new.genus, '') || ' ' || coalesce(new.species, '')));
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS search_animal_update AFTER UPDATE ON "Animal" BEGIN
+        UPDATE search_index
+        SET title = trim(coalesce(new.genus, '') || ' ' || coalesce(new.species, ''))
+        WHERE kind = 'animal' AND ref_id = new.id;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS search_animal_delete AFTER DELETE ON "Animal" BEGIN
+        DELETE FROM search_index WHERE kind = 'animal' AND ref_id = old.id;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS search_institution_insert AFTER INSERT ON "Institution" BEGIN
+        INSERT INTO search_index (kind, ref_id, title)
+        VALUES ('institution', new.id, coalesce(new.name, ''));
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS search_institution_update AFTER UPDATE ON "Institution" BEGIN
+        UPDATE search_index SET title = coalesce(new.name, '')
+        WHERE kind = 'institution' AND ref_id = new.id;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS search_institution_delete AFTER DELETE ON "Institution" BEGIN
+        DELETE FROM search_index WHERE kind = 'institution' AND ref_id = old.id;
+    END''',
+]
+
+SQLITE_BACKFILL = [
+    '''DELETE FROM search_index''',
+    '''INSERT INTO search_index (kind, ref_id, title)
+        SELECT 'animal', id, trim(coalesce(genus, '') || ' ' || coalesce(species, ''))
+        FROM "Animal"''',
+    '''INSERT INTO search_index (kind, ref_id, title)
+        SELECT 'institution', id, coalesce(name, '') FROM "Institution"''',
+]
+
+SQLITE_INDEX_OBJECTS = (
+    'search_index',
+    'search_animal_insert', 'search_animal_update', 'search_animal_delete',
+    'search_institution_insert', 'search_institution_update',
+    'search_institution_delete',
+)
+
+
+'''
+ensure_sqlite_index(session)
+    creates the FTS5 table and its triggers if any of them is missing,
+    and backfills it from the existing rows whenever it had to
+    checked on every search rather than cached per engine: drop_all()
+    takes the triggers down with the tables, and a recreated database
+    has no search_index at all
+'''
+def ensure_sqlite_index(session):
+    present = session.execute(
+        text('SELECT count(*) FROM sqlite_master WHERE name IN :names')
+        .bindparams(bindparam('names', expanding=True)),
+        {'names': list(SQLITE_INDEX_OBJECTS)}).scalar()
+    if present == len(SQLITE_INDEX_OBJECTS):
+        return
+    use_primary(session)
+    for statement in SQLITE_INDEX + SQLITE_BACKFILL:
+        session.execute(text(statement))
+    session.commit()
+
+
+def _terms(search_term):
+    return re.findall(r'[^\W_]+', search_term)
+
+
+def _highlight(snippet):
+    return Markup(escape(snippet or '')
+                  .replace(START_SEL, Markup('<mark>'))
+                  .replace(STOP_SEL, Markup('</mark>')))
+
+
+'''
+search(session, search_term, page=1, per_page=20)
+    returns (results, has_next) for one page of ranked matches
+    each result is a dict with kind, id, rank and an html-safe highlighted snippet
+    every word of search_term must match (as a prefix) somewhere in the entity
+'''
+def search(session, search_term, page=1, per_page=20):
+    terms = _terms(search_term)
+    if not terms:
+        return [], False
+
+    params = {'limit': per_page + 1, 'offset': (page - 1) * per_page}
+    if session.get_bind().dialect.name == 'postgresql':
+        params['query'] = ' & '.join(term + ':*' for term in terms)
+        params['headline_options'] = \
+            'StartSel={}, StopSel={}, HighlightAll=true'.format(START_SEL, STOP_SEL)
+        rows = session.execute(POSTGRES_SEARCH, params).all()
+    else:
+        ensure_sqlite_index(session)
+        params['query'] = ' '.join('"{}"*'.format(term) for term in terms)
+        params['start_sel'] = START_SEL
+        params['stop_sel'] = STOP_SEL
+        rows = session.execute(SQLITE_SEARCH, params).all()
+
+    results = [{
+        'kind': row.kind,
+        'id': row.id,
+        'rank': row.rank,
+        'snippet': _highlight(row.snippet)
+    } for row in rows[:per_page]]
+    return results, len(rows) > per_page
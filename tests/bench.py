@@ -0,0 +1,49 @@
+"""
+measuring helpers for the tests marked benchmark
+
+    the numbers are printed, run pytest with -s to see them
+    BENCHMARK_SCALE multiplies the seeded row counts, e.g.
+    BENCHMARK_SCALE=100 for the sizes the original requests quote
+"""
+import os
+import time
+import tracemalloc
+
+
+def scaled(rows):
+    return max(1, int(rows * float(os.environ.get("BENCHMARK_SCALE", 1))))
+
+
+def per_call(fn, number=100, repeat=3):
+    """
+    best seconds per call of fn over repeat rounds of number calls
+    """
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = (time.perf_counter() - started) / number
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def allocations(fn):
+    """
+    (result, peak bytes, live allocated blocks) of one call of fn
+    """
+    tracemalloc.start()
+    try:
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+        blocks = sum(
+            stat.count for stat in
+            tracemalloc.take_snapshot().statistics("filename"))
+    finally:
+        tracemalloc.stop()
+    return result, peak, blocks
+
+
+def report(title, **values):
+    print("\n{}: {}".format(title, ", ".join(
+        "{}={}".format(key, value) for key, value in values.items())))
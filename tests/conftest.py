@@ -0,0 +1,178 @@
+import importlib
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+
+ROOT_DIR = os.path.join(os.path.dirname(__file__), "..")
+FYURR_DIR = os.path.join(ROOT_DIR, "fyurr")
+# both apps import their modules by flat name, and share some of the names
+ROOT_MODULES = ("app", "models", "config", "forms", "enum1", "search",
+                "pagination", "ingest", "partitions", "auth", "auth.auth")
+FYURR_MODULES = ("app", "models", "config", "forms", "enum1",
+                 "cache", "feed", "bulk")
+
+
+def import_app(directory, modules, database_url):
+    """
+    imports the app module in directory on database_url, leaving none of its
+    modules in sys.modules so the other app can be imported afterwards
+    """
+    os.environ["DATABASE_URL"] = database_url
+    for name in ROOT_MODULES + FYURR_MODULES:
+        sys.modules.pop(name, None)
+    sys.path.insert(0, directory)
+    try:
+        return importlib.import_module("app")
+    finally:
+        sys.path.remove(directory)
+        os.environ.pop("DATABASE_URL")
+        for name in modules:
+            sys.modules.pop(name, None)
+
+
+@pytest.fixture(scope="session")
+def fyurr(tmp_path_factory):
+    """
+    the fyurr app module, on a throwaway SQLite database
+    """
+    return import_app(FYURR_DIR, FYURR_MODULES, "sqlite:///{}".format(
+        tmp_path_factory.mktemp("fyurr") / "fyurr.db"))
+
+
+@pytest.fixture
+def fyurr_db(fyurr):
+    db = fyurr.db
+    with fyurr.app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield db
+        db.session.remove()
+
+
+@pytest.fixture(scope="session")
+def specimens(tmp_path_factory):
+    """
+    the specimen finder app module, on a throwaway SQLite database
+    """
+    return import_app(ROOT_DIR, ROOT_MODULES, "sqlite:///{}".format(
+        tmp_path_factory.mktemp("specimens") / "specimens.db"))
+
+
+@pytest.fixture
+def specimens_db(specimens):
+    db = specimens.db
+    with specimens.app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield db
+        db.session.remove()
+
+
+@pytest.fixture(scope="session")
+def postgres_url():
+    """
+    TEST_DATABASE_URL, a Postgres database the tests may write to;
+    tests marked postgres are skipped without it
+    """
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    return url
+
+
+def postgres_schema(url, schema):
+    """
+    recreates schema and returns url with it first on the search_path,
+    so each app gets its own tables and alembic_version
+    """
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text('DROP SCHEMA IF EXISTS "{0}" CASCADE; '
+                          'CREATE SCHEMA "{0}"'.format(schema)))
+    engine.dispose()
+    return make_url(url).update_query_dict(
+        {"options": "-csearch_path={},public".format(schema)}
+    ).render_as_string(hide_password=False)
+
+
+def migrated_app(directory, modules, url):
+    from flask_migrate import upgrade
+
+    module = import_app(directory, modules, url)
+    with module.app.app_context():
+        upgrade(directory=os.path.join(directory, "migrations"))
+    return module
+
+
+@pytest.fixture(scope="session")
+def specimens_pg(postgres_url):
+    """
+    the specimen finder app module, migrated to head on Postgres
+    """
+    return migrated_app(ROOT_DIR, ROOT_MODULES,
+                        postgres_schema(postgres_url, "specimens"))
+
+
+@pytest.fixture(scope="session")
+def fyurr_pg(postgres_url):
+    """
+    the fyurr app module on Postgres, with the tables created from the
+    models (its first migration alters tables made before it existed)
+    """
+    module = import_app(FYURR_DIR, FYURR_MODULES,
+                        postgres_schema(postgres_url, "fyurr"))
+    with module.app.app_context():
+        module.db.create_all()
+    return module
+
+
+COFFEESHOP_DIR = os.path.join(
+    os.path.dirname(__file__), "..", "coffeeshop", "backend")
+
+
+@pytest.fixture(scope="session")
+def coffeeshop(tmp_path_factory):
+    """
+    the coffeeshop api module, on a throwaway SQLite primary and replica
+    """
+    directory = tmp_path_factory.mktemp("coffeeshop")
+    environ = {
+        "DATABASE_URL": "sqlite:///{}".format(directory / "primary.db"),
+        "SQLALCHEMY_REPLICA_URIS": "sqlite:///{}".format(
+            directory / "replica.db"),
+    }
+    os.environ.update(environ)
+    if COFFEESHOP_DIR not in sys.path:
+        sys.path.insert(0, COFFEESHOP_DIR)
+    try:
+        return importlib.import_module("src.api")
+    finally:
+        for name in environ:
+            os.environ.pop(name)
+
+
+@pytest.fixture
+def coffeeshop_db(coffeeshop):
+    db = coffeeshop.app.extensions["sqlalchemy"]
+    with coffeeshop.app.app_context():
+        for key in (None, "replica_0"):
+            db.metadata.drop_all(db.engines[key])
+            db.metadata.create_all(db.engines[key])
+        coffeeshop.menu_cache.invalidate()
+        yield db
+        db.session.remove()
+
+
+@pytest.fixture
+def barista(coffeeshop, monkeypatch):
+    """
+    authenticates every request as a barista holding all the permissions
+    """
+    permissions = frozenset((
+        "get:drinks-detail", "post:drinks", "patch:drinks", "delete:drinks"))
+    monkeypatch.setattr(
+        coffeeshop.auth0, "authenticate", lambda: ({}, permissions))
@@ -0,0 +1,110 @@
+"""
+EXPLAIN helpers for the tests marked postgres
+"""
+import contextlib
+
+from sqlalchemy import event
+
+
+def engine_of(module):
+    """
+    the default engine of an app module
+    """
+    with module.app.app_context():
+        return module.db.engine
+
+
+def seed(engine, sql, analyze=True):
+    """
+    runs sql, then (with analyze) VACUUM ANALYZE so the planner sees the
+    seeded data
+    """
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+        connection.commit()
+        if not analyze:
+            return
+        connection.dbapi_connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute("VACUUM ANALYZE")
+    finally:
+        connection.dbapi_connection.autocommit = False
+        connection.close()
+
+
+@contextlib.contextmanager
+def captured_statements(engine):
+    """
+    collects (statement, parameters) for every SELECT run on engine
+    inside the with block
+    """
+    executed = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            executed.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield executed
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def captured_request(module, url, method="GET", **kwargs):
+    """
+    (response, captured statements) of one request to module's app
+    """
+    with captured_statements(engine_of(module)) as executed:
+        response = module.app.test_client().open(
+            url, method=method, **kwargs)
+    return response, executed
+
+
+def plan(conn, statement, parameters=None, analyze=False):
+    """
+    returns the root node of the JSON plan of statement
+    """
+    options = "ANALYZE, FORMAT JSON" if analyze else "FORMAT JSON"
+    return conn.exec_driver_sql(
+        "EXPLAIN ({}) {}".format(options, statement), parameters or {}
+    ).scalar()[0]["Plan"]
+
+
+def nodes(node):
+    yield node
+    for child in node.get("Plans", ()):
+        yield from nodes(child)
+
+
+def scanned(node, node_type, tables):
+    """
+    names of the relations in the plan read by node_type whose name starts
+    with one of tables (partitions included)
+    """
+    return sorted(
+        child["Relation Name"] for child in nodes(node)
+        if child["Node Type"] == node_type and
+        child.get("Relation Name", "").startswith(tuple(tables)))
+
+
+def index_names(node):
+    return {child["Index Name"] for child in nodes(node)
+            if "Index Name" in child}
+
+
+def seq_scans(engine, executed, tables):
+    """
+    (statement, relations) for every captured statement with a sequential
+    scan of one of tables
+    """
+    found = []
+    with engine.connect() as conn:
+        for statement, parameters in executed:
+            relations = scanned(
+                plan(conn, statement, parameters), "Seq Scan", tables)
+            if relations:
+                found.append((statement, relations))
+    return found
@@ -0,0 +1,69 @@
+WATER = [{"name": "water", "color": "blue", "parts": 1}]
+
+
+def test_menu_is_built_from_the_primary(coffeeshop, coffeeshop_db):
+    Drink = coffeeshop.Drink
+    with coffeeshop_db.engines["replica_0"].begin() as conn:
+        conn.execute(Drink.__table__.insert(),
+                     {"title": "stale", "recipe": WATER})
+    Drink(title="fresh", recipe=WATER).insert()
+
+    response = coffeeshop.app.test_client().get("/drinks")
+    assert [drink["title"] for drink in response.get_json()["drinks"]] == [
+        "fresh"]
+
+
+def test_post_returns_only_the_new_drink(coffeeshop, coffeeshop_db, barista):
+    coffeeshop.Drink(title="tea", recipe=WATER).insert()
+    response = coffeeshop.app.test_client().post(
+        "/drinks", json={"title": "water", "recipe": WATER})
+    assert response.status_code == 200
+    drinks = response.get_json()["drinks"]
+    assert [(drink["title"], drink["recipe"]) for drink in drinks] == [
+        ("water", WATER)]
+
+
+def test_patch_returns_only_the_updated_drink(
+        coffeeshop, coffeeshop_db, barista):
+    coffeeshop.Drink(title="tea", recipe=WATER).insert()
+    drink = coffeeshop.Drink(title="water", recipe=WATER)
+    drink.insert()
+    response = coffeeshop.app.test_client().patch(
+        "/drinks/{}".format(drink.id), json={"title": "still water"})
+    assert response.status_code == 200
+    assert response.get_json()["drinks"] == [
+        {"id": drink.id, "title": "still water", "recipe": WATER}]
+
+
+def test_delete_returns_only_the_deleted_id(
+        coffeeshop, coffeeshop_db, barista):
+    coffeeshop.Drink(title="tea", recipe=WATER).insert()
+    drink = coffeeshop.Drink(title="water", recipe=WATER)
+    drink.insert()
+    response = coffeeshop.app.test_client().delete(
+        "/drinks/{}".format(drink.id))
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["delete"] == drink.id
+    assert "drinks" not in body
+
+
+def test_include_all_returns_the_whole_long_menu(
+        coffeeshop, coffeeshop_db, barista):
+    client = coffeeshop.app.test_client()
+    client.post("/drinks", json={"title": "tea", "recipe": WATER})
+    created = client.post(
+        "/drinks?include=all", json={"title": "water", "recipe": WATER})
+    assert [drink["title"] for drink in created.get_json()["drinks"]] == [
+        "tea", "water"]
+    assert created.get_json()["drinks"][0]["recipe"] == WATER
+
+    water = created.get_json()["drinks"][1]["id"]
+    updated = client.patch("/drinks/{}?include=all".format(water),
+                           json={"title": "still water"})
+    assert [drink["title"] for drink in updated.get_json()["drinks"]] == [
+        "tea", "still water"]
+
+    deleted = client.delete("/drinks/{}?include=all".format(water))
+    assert [drink["title"] for drink in deleted.get_json()["drinks"]] == [
+        "tea"]
@@ -0,0 +1,91 @@
+"""
+menu serialization, before and after recipes were stored as a JSON column,
+and write latency as the menu grows
+"""
+import itertools
+import json
+
+import pytest
+from sqlalchemy import String, select, type_coerce
+
+from bench import per_call, report, scaled
+
+RECIPE = [
+    {"name": "espresso", "color": "brown", "parts": 1},
+    {"name": "milk", "color": "white", "parts": 3},
+    {"name": "foam", "color": "beige", "parts": 1},
+]
+
+
+def legacy_short(drink_id, title, recipe):
+    # short() from when recipe was a String column: parsed per call, twice
+    json.loads(recipe)
+    short_recipe = [
+        {"color": r["color"], "parts": r["parts"]} for r in json.loads(recipe)]
+    return {"id": drink_id, "title": title, "recipe": short_recipe}
+
+
+def add_drinks(coffeeshop, db, count, start=0):
+    with db.engine.begin() as conn:
+        conn.execute(coffeeshop.Drink.__table__.insert(), [
+            {"title": "drink {}".format(i), "recipe": RECIPE}
+            for i in range(start, start + count)])
+
+
+@pytest.fixture
+def menu(coffeeshop, coffeeshop_db):
+    count = scaled(1000)
+    add_drinks(coffeeshop, coffeeshop_db, count)
+    return count
+
+
+@pytest.mark.benchmark
+def test_benchmark_menu_serialization(coffeeshop, coffeeshop_db, menu):
+    Drink = coffeeshop.Drink
+    drinks = Drink.query.order_by(Drink.id).all()
+    stored = coffeeshop_db.session.execute(
+        select(Drink.id, Drink.title, type_coerce(Drink.recipe, String))
+    ).all()
+
+    before = per_call(lambda: [legacy_short(*row) for row in stored], 10)
+    after = per_call(lambda: [drink.short() for drink in drinks], 10)
+
+    client = coffeeshop.app.test_client()
+
+    def cold():
+        coffeeshop.menu_cache.invalidate()
+        assert client.get("/drinks").status_code == 200
+
+    uncached = per_call(cold, 10)
+    cached = per_call(lambda: client.get("/drinks"), 10)
+    report("short menu of {} drinks, menus/s".format(menu),
+           string_recipes=round(1 / before, 1),
+           json_column=round(1 / after, 1),
+           get_uncached=round(1 / uncached, 1),
+           get_cached=round(1 / cached, 1))
+    assert after < before
+    assert cached < uncached
+
+
+@pytest.mark.benchmark
+def test_benchmark_write_latency_by_menu_size(
+        coffeeshop, coffeeshop_db, barista):
+    client = coffeeshop.app.test_client()
+    titles = ("new drink {}".format(i) for i in itertools.count())
+
+    def post(url="/drinks"):
+        response = client.post(
+            url, json={"title": next(titles), "recipe": RECIPE})
+        assert response.status_code == 200
+
+    small, large = 10, scaled(1000)
+    add_drinks(coffeeshop, coffeeshop_db, small)
+    latency_small = per_call(post, 20)
+    add_drinks(coffeeshop, coffeeshop_db, large - small, start=small)
+    latency_large = per_call(post, 20)
+    include_all = per_call(lambda: post("/drinks?include=all"), 5)
+    report("POST /drinks with {} and {} drinks, ms".format(small, large),
+           small=round(latency_small * 1000, 2),
+           large=round(latency_large * 1000, 2),
+           large_include_all=round(include_all * 1000, 2))
+    assert latency_large < latency_small * 2
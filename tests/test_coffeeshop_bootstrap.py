@@ -0,0 +1,73 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from conftest import COFFEESHOP_DIR
+
+
+WATER = [{"name": "water", "color": "blue", "parts": 1}]
+
+
+@pytest.fixture
+def models(coffeeshop):
+    import src.database.models as models
+    return models
+
+
+def test_startup_does_not_touch_the_database(tmp_path):
+    # the api used to drop and recreate every table on import
+    database = tmp_path / "fresh.db"
+    environ = dict(os.environ, DATABASE_URL="sqlite:///{}".format(database))
+    output = subprocess.run(
+        [sys.executable, "-c",
+         "import time; started = time.perf_counter(); import src.api; "
+         "print(time.perf_counter() - started)"],
+        cwd=COFFEESHOP_DIR, env=environ, check=True,
+        capture_output=True, text=True).stdout
+    print("api import: {:.0f} ms".format(float(output) * 1000))
+    assert not database.exists()
+
+
+def test_bootstrap_keeps_data_and_is_fast(
+        coffeeshop, coffeeshop_db, models):
+    coffeeshop_db.session.execute(
+        models.Drink.__table__.insert(),
+        [{"title": "drink {}".format(i), "recipe": WATER}
+         for i in range(1000)])
+    coffeeshop_db.session.commit()
+
+    started = time.perf_counter()
+    assert models.bootstrap_db(seed=True) is False
+    elapsed = time.perf_counter() - started
+    print("bootstrap_db on 1000 drinks: {:.1f} ms".format(elapsed * 1000))
+
+    assert coffeeshop_db.session.query(models.Drink).count() == 1000
+    assert elapsed < 2
+
+
+def test_concurrent_bootstraps_seed_once(coffeeshop, coffeeshop_db, models):
+    coffeeshop_db.drop_all()
+    results = []
+
+    def worker():
+        with coffeeshop.app.app_context():
+            results.append(models.bootstrap_db(seed=True))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(results) == [False, False, False, True]
+    assert coffeeshop_db.session.query(models.Drink).count() == 1
+
+
+def test_bootstrap_command(coffeeshop, coffeeshop_db):
+    result = coffeeshop.app.test_cli_runner().invoke(
+        args=["bootstrap-db", "--seed"])
+    assert result.output == "database ready, demo drink added\n"
@@ -0,0 +1,52 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(
+    os.path.dirname(__file__), "..", "coffeeshop", "backend"))
+
+from src.database.cache import (  # noqa: E402
+    FileBackend, MemoryBackend, MenuCache, cache_backend)
+
+
+class Builder:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return "menu {}".format(self.calls).encode()
+
+
+def test_hit_until_invalidated():
+    cache = MenuCache(MemoryBackend(ttl=60))
+    build = Builder()
+    body, etag = cache.get("short", build)
+    assert cache.get("short", build) == (body, etag)
+    cache.invalidate()
+    assert cache.get("short", build)[0] == b"menu 2"
+    assert build.calls == 2
+
+
+def test_memory_entries_expire():
+    # another worker's write never reaches this process, the ttl bounds it
+    cache = MenuCache(MemoryBackend(ttl=0))
+    build = Builder()
+    cache.get("short", build)
+    cache.get("short", build)
+    assert build.calls == 2
+
+
+def test_file_backend_is_shared_between_caches(tmp_path):
+    worker_a = MenuCache(FileBackend(str(tmp_path)))
+    worker_b = MenuCache(FileBackend(str(tmp_path)))
+    build = Builder()
+    worker_a.get("long", build)
+    assert worker_b.get("long", build)[0] == b"menu 1"
+    worker_b.invalidate()
+    assert worker_a.get("long", build)[0] == b"menu 2"
+
+
+def test_cache_backend_from_environment(tmp_path):
+    assert isinstance(cache_backend({"MENU_CACHE_DIR": str(tmp_path)}), FileBackend)
+    backend = cache_backend({"MENU_CACHE_TTL": "2"})
+    assert isinstance(backend, MemoryBackend) and backend.ttl == 2
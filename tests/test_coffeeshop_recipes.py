@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(
+    os.path.dirname(__file__), "..", "coffeeshop", "backend"))
+
+from src.database.models import Drink  # noqa: E402
+
+
+WATER = {"name": "water", "color": "blue", "parts": 1}
+
+
+@pytest.mark.parametrize("recipe", [
+    [WATER],
+    WATER,
+    '[{"name": "water", "color": "blue", "parts": 1}]',
+    '"{\\"name\\": \\"water\\", \\"color\\": \\"blue\\", \\"parts\\": 1}"',
+])
+def test_recipe_is_normalized_to_a_list(recipe):
+    assert Drink(title="water", recipe=recipe).recipe == [WATER]
+
+
+@pytest.mark.parametrize("recipe", [
+    "water",
+    None,
+    [],
+    "[]",
+    [1],
+    [{"name": "water"}],
+    42,
+])
+def test_invalid_recipe_raises_value_error(recipe):
+    with pytest.raises(ValueError):
+        Drink(title="water", recipe=recipe)
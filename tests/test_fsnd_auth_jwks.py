@@ -0,0 +1,141 @@
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+import requests
+import rsa
+from flask import Flask, jsonify
+from jose import jwk, jwt
+
+from fsnd_auth import Auth0
+from fsnd_auth.keys import JWKSKeyStore
+
+from bench import per_call, report
+
+
+DOMAIN = "tenant.example.com"
+AUDIENCE = "drinks"
+KID = "test-key"
+
+
+@pytest.fixture(scope="module")
+def signing_key():
+    _, private_key = rsa.newkeys(1024)
+    pem = private_key.save_pkcs1().decode()
+    public = jwk.construct(pem, "RS256").public_key().to_dict()
+    public.update({"kid": KID, "use": "sig"})
+    return pem, public
+
+
+@pytest.fixture
+def jwks_server(signing_key):
+    requests_served = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests_served.append(self.path)
+            body = json.dumps({"keys": [signing_key[1]]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = "http://127.0.0.1:{}/.well-known/jwks.json".format(
+        server.server_address[1])
+    yield url, requests_served
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(jwks_server):
+    url, _ = jwks_server
+    auth = Auth0(DOMAIN, AUDIENCE)
+    auth.key_store = JWKSKeyStore(url)
+
+    app = Flask(__name__)
+    auth.init_app(app)
+
+    @app.route("/drinks-detail")
+    @auth.requires_auth("get:drinks-detail")
+    def drinks_detail(payload):
+        return jsonify({"sub": payload["sub"]})
+
+    yield app.test_client()
+    auth.key_store.stop()
+
+
+def token(pem, subject, kid=KID):
+    return jwt.encode({
+        "sub": subject,
+        "aud": AUDIENCE,
+        "iss": "https://{}/".format(DOMAIN),
+        "exp": int(time.time()) + 300,
+        "permissions": ["get:drinks-detail"],
+    }, pem, algorithm="RS256", headers={"kid": kid})
+
+
+def test_jwks_is_fetched_once_across_requests(client, jwks_server, signing_key):
+    _, requests_served = jwks_server
+    for number in range(5):
+        response = client.get("/drinks-detail", headers={
+            "Authorization": "Bearer " + token(signing_key[0], str(number))})
+        assert response.status_code == 200
+        assert response.get_json() == {"sub": str(number)}
+    assert len(requests_served) == 1
+
+
+def test_unknown_kid_does_not_refetch_right_away(
+        client, jwks_server, signing_key):
+    _, requests_served = jwks_server
+    for kid in (KID, "rotated", "rotated"):
+        client.get("/drinks-detail", headers={
+            "Authorization": "Bearer " + token(signing_key[0], "1", kid)})
+    assert len(requests_served) == 1
+
+
+@pytest.mark.benchmark
+def test_benchmark_key_reuse(jwks_server, signing_key):
+    # before: every verification fetched the JWKS, constructed the key and
+    # serialized it to PEM for jwt.decode to parse again
+    url, _ = jwks_server
+    tokens = [token(signing_key[0], str(number)) for number in range(50)]
+    auth = Auth0(DOMAIN, AUDIENCE)
+    auth.key_store = JWKSKeyStore(url)
+    issuer = "https://{}/".format(DOMAIN)
+
+    def per_request(encoded):
+        kid = jwt.get_unverified_header(encoded)["kid"]
+        jwks = requests.get(url).json()
+        key = next(key for key in jwks["keys"] if key["kid"] == kid)
+        pem = jwk.construct(key, "RS256").to_pem()
+        return jwt.decode(encoded, pem, algorithms=["RS256"],
+                          audience=AUDIENCE, issuer=issuer)
+
+    def decode_only(encoded):
+        pem = jwk.construct(signing_key[1], "RS256").to_pem()
+        return jwt.decode(encoded, pem, algorithms=["RS256"],
+                          audience=AUDIENCE, issuer=issuer)
+
+    cycle = itertools.cycle(tokens)
+    before = per_call(lambda: per_request(next(cycle)), number=50)
+    construct = per_call(lambda: decode_only(next(cycle)), number=50)
+    after = per_call(
+        lambda: auth.verify_decode_jwt(next(cycle)), number=50)
+    auth.key_store.stop()
+
+    report("verify_decode_jwt per token",
+           fetch_construct_pem_us=round(before * 1e6),
+           construct_pem_us=round(construct * 1e6),
+           key_store_us=round(after * 1e6))
+    assert after < construct < before
@@ -0,0 +1,42 @@
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+from fsnd_db import PoolMonitor, ReplicaRouter, RoutingSession, TimedQueuePool
+
+
+def make_app(tmp_path, **config):
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI="sqlite:///{}".format(tmp_path / "primary.db"),
+        SQLALCHEMY_REPLICA_URIS="sqlite:///{}".format(tmp_path / "replica.db"),
+        DB_POOL_SIZE=3, DB_MAX_OVERFLOW=2, **config)
+    db = SQLAlchemy(session_options={"class_": RoutingSession})
+    ReplicaRouter(app)
+    PoolMonitor(app)
+    db.init_app(app)
+    return app, db
+
+
+@pytest.mark.parametrize("key", [None, "replica_0"])
+def test_every_engine_gets_the_pool_options(tmp_path, key):
+    app, db = make_app(tmp_path)
+    with app.app_context():
+        pool = db.engines[key].pool
+    assert isinstance(pool, TimedQueuePool)
+    assert pool.size() == 3 and pool._max_overflow == 2
+
+
+def test_metrics_endpoint_is_off_by_default(tmp_path):
+    app, db = make_app(tmp_path)
+    assert app.test_client().get("/internal/pool").status_code == 404
+
+
+def test_metrics_endpoint_reports_each_engine(tmp_path):
+    app, db = make_app(tmp_path, DB_POOL_METRICS=True)
+    with app.app_context():
+        with db.engines["replica_0"].connect():
+            pass
+    engines = app.test_client().get("/internal/pool").get_json()["engines"]
+    assert set(engines) == {"default", "replica_0"}
+    assert engines["replica_0"]["wait_seconds"]["count"] == 1
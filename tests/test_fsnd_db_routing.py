@@ -0,0 +1,73 @@
+import pytest
+from flask import Flask, jsonify
+from flask_sqlalchemy import SQLAlchemy
+
+from fsnd_db import ReplicaRouter, RoutingSession
+from fsnd_db.routing import STICKY_COOKIE
+
+
+@pytest.fixture
+def routed(tmp_path):
+    db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+    class Note(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        text = db.Column(db.String, nullable=False)
+
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI="sqlite:///{}".format(tmp_path / "primary.db"),
+        SQLALCHEMY_REPLICA_URIS="sqlite:///{}".format(tmp_path / "replica.db"))
+    ReplicaRouter(app)
+    db.init_app(app)
+
+    @app.route("/notes")
+    def notes():
+        # callers read the dialect this way before building their query
+        dialect = db.session.get_bind().dialect.name
+        texts = [note.text for note in db.session.scalars(db.select(Note))]
+        return jsonify({"dialect": dialect, "notes": texts})
+
+    @app.route("/notes", methods=["POST"])
+    def add_note():
+        db.session.add(Note(text="written"))
+        db.session.commit()
+        return jsonify({"notes": [
+            note.text for note in db.session.scalars(db.select(Note))]})
+
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines["replica_0"])
+        with db.engines[None].begin() as conn:
+            conn.execute(Note.__table__.insert(), {"text": "primary"})
+        with db.engines["replica_0"].begin() as conn:
+            conn.execute(Note.__table__.insert(), {"text": "replica"})
+
+    return app, db, Note
+
+
+def test_get_reads_replica_after_checking_dialect(routed):
+    app, db, Note = routed
+    body = app.test_client().get("/notes").get_json()
+    assert body == {"dialect": "sqlite", "notes": ["replica"]}
+
+
+def test_writes_go_to_primary_and_stick(routed):
+    app, db, Note = routed
+    client = app.test_client()
+
+    response = client.post("/notes")
+    assert response.get_json()["notes"] == ["primary", "written"]
+    assert STICKY_COOKIE in response.headers["Set-Cookie"]
+    assert client.get("/notes").get_json()["notes"] == ["primary", "written"]
+
+    with app.app_context():
+        with db.engines["replica_0"].connect() as conn:
+            assert conn.execute(db.select(Note.text)).scalars().all() == [
+                "replica"]
+
+
+def test_reads_outside_requests_use_primary(routed):
+    app, db, Note = routed
+    with app.app_context():
+        assert [note.text for note in Note.query.all()] == ["primary"]
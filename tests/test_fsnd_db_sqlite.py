@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+from bench import report, scaled
+from fsnd_db import apply_sqlite_pragmas, sqlite_pragmas
+
+
+def test_coffeeshop_connections_use_the_profile(coffeeshop, coffeeshop_db):
+    for key in (None, "replica_0"):
+        with coffeeshop_db.engines[key].connect() as conn:
+            pragma = conn.exec_driver_sql
+            assert pragma("PRAGMA journal_mode").scalar() == "wal"
+            assert pragma("PRAGMA synchronous").scalar() == 1  # NORMAL
+            assert pragma("PRAGMA cache_size").scalar() == -20000
+            assert pragma("PRAGMA busy_timeout").scalar() == 5000
+
+
+def test_pragmas_from_environment():
+    pragmas = dict(sqlite_pragmas(
+        {"SQLITE_BUSY_TIMEOUT": "10000", "SQLITE_MMAP_SIZE": ""}))
+    assert pragmas["busy_timeout"] == "10000"
+    assert "mmap_size" not in pragmas
+    assert sqlite_pragmas({"SQLITE_PROFILE": "off"}) == []
+    with pytest.raises(ValueError):
+        sqlite_pragmas({"SQLITE_CACHE_SIZE": "1; DROP TABLE drink"})
+
+
+def make_engine(path, pragmas):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///{}".format(path)
+    db = SQLAlchemy()
+    db.init_app(app)
+    apply_sqlite_pragmas(app, db, pragmas)
+    with app.app_context():
+        engine = db.engine
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE drink (id INTEGER PRIMARY KEY, title TEXT)")
+    return engine
+
+
+def ops_per_second(engine, writers=4, readers=4, operations=scaled(200)):
+    # gunicorn-style: every worker thread has its own pooled connection
+    errors = []
+
+    def write():
+        for _ in range(operations):
+            with engine.begin() as conn:
+                conn.exec_driver_sql(
+                    "INSERT INTO drink (title) VALUES ('drink')")
+
+    def read():
+        for _ in range(operations):
+            with engine.connect() as conn:
+                conn.exec_driver_sql("SELECT count(*) FROM drink").scalar()
+
+    def run(work):
+        try:
+            work()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(write,))
+               for _ in range(writers)]
+    threads += [threading.Thread(target=run, args=(read,))
+                for _ in range(readers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    assert not errors
+    return (writers + readers) * operations / elapsed
+
+
+@pytest.mark.benchmark
+def test_benchmark_concurrent_reads_and_writes(tmp_path):
+    # the rollback journal gets the same busy timeout, or its writers
+    # would simply fail with "database is locked"
+    rollback = ops_per_second(make_engine(
+        tmp_path / "rollback.db", [("busy_timeout", "5000")]))
+    wal = ops_per_second(make_engine(tmp_path / "wal.db", sqlite_pragmas({})))
+    report("4 writer and 4 reader threads, ops/s",
+           rollback_journal=round(rollback), wal=round(wal))
+    assert wal > rollback
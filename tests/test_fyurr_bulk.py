@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def import_client(fyurr, fyurr_db):
+    venue = fyurr.Venue(name="The Hall", city="Austin", state="TX")
+    artist = fyurr.Artist(name="Band", city="Austin", state="TX")
+    fyurr_db.session.add_all([venue, artist])
+    fyurr_db.session.commit()
+    fyurr.app.config["SHOW_IMPORT_BATCH_SIZE"] = 1
+    yield fyurr.app.test_client(), venue.id, artist.id
+    fyurr.app.config["SHOW_IMPORT_BATCH_SIZE"] = 1000
+
+
+def rows(venue_id, artist_id, count):
+    start = datetime.now() + timedelta(days=7)
+    return "".join(
+        '{{"venue_id": {}, "artist_id": {}, "start_time": "{}"}}\n'.format(
+            venue_id, artist_id, (start + timedelta(days=i)).isoformat())
+        for i in range(count)).encode()
+
+
+def counts(fyurr, fyurr_db):
+    return (
+        fyurr_db.session.scalar(fyurr_db.select(fyurr_db.func.count(
+            fyurr.Show.id))),
+        fyurr_db.session.scalar(fyurr_db.select(fyurr_db.func.count(
+            fyurr.feed.UpcomingShow.show_id))))
+
+
+def test_import_reports_and_feeds_shows(fyurr, fyurr_db, import_client):
+    client, venue_id, artist_id = import_client
+    body = rows(venue_id, artist_id, 3) + b'{"venue_id": 999}\n'
+    response = client.post("/shows/import?format=ndjson", data=body)
+    assert response.status_code == 200
+    assert response.get_json()["inserted"] == 3
+    assert response.get_json()["failed"] == 1
+    assert counts(fyurr, fyurr_db) == (3, 3)
+
+
+def test_bad_encoding_keeps_committed_batches_in_the_feed(
+        fyurr, fyurr_db, import_client):
+    client, venue_id, artist_id = import_client
+    body = rows(venue_id, artist_id, 2) + b'\xff\n'
+    response = client.post("/shows/import?format=ndjson", data=body)
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
+    assert counts(fyurr, fyurr_db) == (2, 2)
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def shows(fyurr, fyurr_db):
+    now = datetime.now()
+    venue = fyurr.Venue(name="The Hall", city="Austin", state="TX")
+    artist = fyurr.Artist(name="Before", city="Austin", state="TX")
+    fyurr_db.session.add_all([venue, artist])
+    fyurr_db.session.flush()
+    for days in (-1, 1, 2):
+        fyurr_db.session.add(fyurr.Show(
+            venue_id=venue.id, artist_id=artist.id,
+            start_time=now + timedelta(days=days)))
+    fyurr_db.session.commit()
+    return now, venue, artist
+
+
+def feed_rows(fyurr, fyurr_db):
+    UpcomingShow = fyurr.feed.UpcomingShow
+    return fyurr_db.session.execute(
+        fyurr_db.select(UpcomingShow.show_id, UpcomingShow.artist_name).
+        order_by(UpcomingShow.start_time)).all()
+
+
+def test_refresh_is_idempotent(fyurr, fyurr_db, shows):
+    fyurr.feed.refresh(fyurr_db.session)
+    fyurr.feed.refresh(fyurr_db.session)
+    fyurr_db.session.commit()
+    assert [row.artist_name for row in feed_rows(fyurr, fyurr_db)] == [
+        "Before", "Before"]
+
+
+def test_refresh_picks_up_renames_and_expires_past_shows(
+        fyurr, fyurr_db, shows):
+    now, venue, artist = shows
+    fyurr.feed.refresh(fyurr_db.session)
+    artist.name = "After"
+    fyurr_db.session.commit()
+
+    fyurr.feed.refresh(fyurr_db.session, artist_id=artist.id,
+                       now=now + timedelta(days=1, hours=1))
+    fyurr_db.session.commit()
+    assert [row.artist_name for row in feed_rows(fyurr, fyurr_db)] == [
+        "After"]
+
+
+def test_add_show_after_refresh(fyurr, fyurr_db, shows):
+    fyurr.feed.refresh(fyurr_db.session)
+    show_id = feed_rows(fyurr, fyurr_db)[0].show_id
+    fyurr.feed.add_show(fyurr_db.session, show_id)
+    fyurr_db.session.commit()
+    assert len(feed_rows(fyurr, fyurr_db)) == 2
+
+
+def test_shows_page_does_not_write(fyurr, fyurr_db, shows):
+    response = fyurr.app.test_client().get("/shows")
+    assert response.status_code == 200
+    assert feed_rows(fyurr, fyurr_db) == []
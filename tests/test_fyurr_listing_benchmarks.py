@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import joinedload
+
+from bench import allocations, per_call, report, scaled
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest.fixture
+def artists(fyurr, fyurr_db):
+    count = scaled(10000)
+    fyurr_db.session.execute(fyurr.Artist.__table__.insert(), [
+        {"name": "Artist {}".format(i), "city": "Austin", "state": "TX",
+         "phone": "555-0100", "genres": ["Jazz"],
+         "image_link": "https://example.com/{}.png".format(i),
+         "facebook_link": "https://facebook.com/{}".format(i)}
+        for i in range(count)])
+    fyurr_db.session.commit()
+    return count
+
+
+def test_benchmark_projection_against_entities(fyurr, fyurr_db, artists):
+    Artist = fyurr.Artist
+
+    def entities():
+        rows = fyurr_db.session.query(Artist).order_by(Artist.id).all()
+        data = [{"id": artist.id, "name": artist.name} for artist in rows]
+        fyurr_db.session.expunge_all()
+        return data
+
+    def projection():
+        rows = fyurr_db.session.query(Artist.id, Artist.name).\
+            order_by(Artist.id).all()
+        return [row._asdict() for row in rows]
+
+    assert entities() == projection()
+    entity_seconds = per_call(entities, number=1)
+    projection_seconds = per_call(projection, number=1)
+    _, entity_peak, entity_blocks = allocations(entities)
+    _, projection_peak, projection_blocks = allocations(projection)
+
+    report("artists listing, {} rows".format(artists),
+           entity_rows_per_s=round(artists / entity_seconds),
+           projection_rows_per_s=round(artists / projection_seconds),
+           entity_peak_kb=entity_peak // 1024,
+           projection_peak_kb=projection_peak // 1024,
+           entity_live_blocks=entity_blocks,
+           projection_live_blocks=projection_blocks)
+    assert projection_seconds < entity_seconds
+    assert projection_peak < entity_peak
+
+
+@pytest.fixture
+def venues_with_shows(fyurr, fyurr_db):
+    venues, shows = scaled(1000), scaled(50000)
+    now = datetime.now()
+    fyurr_db.session.execute(fyurr.Venue.__table__.insert(), [
+        {"name": "Venue {}".format(i), "city": "City {}".format(i % 50),
+         "state": "TX", "genres": ["Jazz"]}
+        for i in range(venues)])
+    fyurr_db.session.execute(fyurr.Artist.__table__.insert(), [
+        {"name": "Artist {}".format(i), "genres": ["Jazz"]}
+        for i in range(venues)])
+    fyurr_db.session.execute(fyurr.Show.__table__.insert(), [
+        {"venue_id": i % venues + 1, "artist_id": (i * 7) % venues + 1,
+         "start_time": now + timedelta(hours=i - shows // 2)}
+        for i in range(shows)])
+    fyurr_db.session.commit()
+    return venues, shows
+
+
+def test_benchmark_list_pages(fyurr, fyurr_db, venues_with_shows):
+    Venue = fyurr.Venue
+    client = fyurr.app.test_client()
+
+    def venues_page():
+        fyurr.venues_cache.clear()
+        assert client.get("/venues").status_code == 200
+
+    def artists_page():
+        assert client.get("/artists").status_code == 200
+
+    def joined_shows():
+        # what lazy='joined' did on every Venue.query.all()
+        venues = Venue.query.options(joinedload(Venue.shows)).all()
+        fyurr_db.session.remove()
+        return venues
+
+    venues_ms = per_call(venues_page, number=3) * 1000
+    artists_ms = per_call(artists_page, number=3) * 1000
+    joined_ms = per_call(joined_shows, number=1) * 1000
+    report("list pages, {} venues and {} shows".format(*venues_with_shows),
+           venues_ms=round(venues_ms, 1), artists_ms=round(artists_ms, 1),
+           joined_venue_load_ms=round(joined_ms, 1))
+    assert venues_ms < joined_ms
+    assert artists_ms < joined_ms
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import selectinload
+
+
+@pytest.fixture
+def listing(fyurr, fyurr_db):
+    now = datetime.now()
+    venue = fyurr.Venue(name="The Hall", city="Austin", state="TX",
+                        genres=["Jazz"], image_link="venue.png")
+    artists = [
+        fyurr.Artist(name="Artist {}".format(i), city="Austin", state="TX",
+                     genres=["Jazz"], image_link="artist.png")
+        for i in range(3)
+    ]
+    fyurr_db.session.add_all([venue] + artists)
+    fyurr_db.session.flush()
+    for days in (-20, -10, 10, 20, 30):
+        for artist in artists:
+            fyurr_db.session.add(fyurr.Show(
+                venue_id=venue.id, artist_id=artist.id,
+                start_time=now + timedelta(days=days)))
+    fyurr_db.session.commit()
+    ids = venue.id, artists[0].id
+    fyurr_db.session.remove()
+    return ids
+
+
+@pytest.fixture
+def statements(fyurr_db):
+    executed = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    engine = fyurr_db.engine
+    event.listen(engine, "before_cursor_execute", count)
+    yield executed
+    event.remove(engine, "before_cursor_execute", count)
+
+
+def test_show_venue_is_one_round_trip(fyurr, listing, statements):
+    venue_id, _ = listing
+    response = fyurr.app.test_client().get("/venues/{}".format(venue_id))
+    assert response.status_code == 200
+    assert b"The Hall" in response.data
+    assert len(statements) == 1
+
+
+def test_show_artist_is_one_round_trip(fyurr, listing, statements):
+    _, artist_id = listing
+    response = fyurr.app.test_client().get("/artists/{}".format(artist_id))
+    assert response.status_code == 200
+    assert b"Artist 0" in response.data
+    assert len(statements) == 1
+
+
+def test_relationships_load_only_when_asked(fyurr, listing):
+    venue_id, _ = listing
+    venue = fyurr.db.session.get(fyurr.Venue, venue_id)
+    with pytest.raises(InvalidRequestError):
+        venue.shows
+    fyurr.db.session.remove()
+
+    venue = fyurr.db.session.get(
+        fyurr.Venue, venue_id, options=[selectinload(fyurr.Venue.shows)])
+    assert len(venue.shows) == 15
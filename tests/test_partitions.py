@@ -0,0 +1,93 @@
+"""
+the yearly Specimen partitions: pruning on bounded sighting ranges, and
+page totals estimated from the partitions' statistics
+"""
+import re
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from bench import report, scaled
+from plans import captured_request, engine_of, nodes, plan, seed
+
+pytestmark = pytest.mark.postgres
+
+YEARS = 5
+
+
+@pytest.fixture(scope="module")
+def sightings(specimens_pg):
+    count = scaled(200000)
+    engine = engine_of(specimens_pg)
+    seed(engine, '''
+        TRUNCATE "Specimen", "Animal", "Institution"
+            RESTART IDENTITY CASCADE;
+        INSERT INTO "Animal" (genus, species) VALUES ('Genus', 'species');
+        INSERT INTO "Institution" (name) VALUES ('Institution');
+        INSERT INTO "Specimen" (animal_id, institution_id, sightingdate)
+        SELECT 1, 1, now() - make_interval(hours => i % {hours})
+        FROM generate_series(1, {count}) i;
+    '''.format(count=count, hours=YEARS * 365 * 24), analyze=False)
+
+    partitions = specimens_pg.partitions
+    with specimens_pg.app.app_context():
+        session = specimens_pg.db.session
+        existing = partitions.existing_partitions(session)
+        this_year = date.today().year
+        for year in range(this_year - YEARS, this_year):
+            if partitions.partition_name(year) not in existing:
+                partitions.create_partition(session, year)
+        session.commit()
+        names = sorted(partitions.existing_partitions(session))
+
+    # autovacuum analyzes the partitions, never the partitioned parent
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        for name in names:
+            conn.exec_driver_sql('ANALYZE "{}"'.format(name))
+    return count, names
+
+
+def test_page_total_is_estimated_from_the_partitions(specimens_pg, sightings):
+    count, _ = sightings
+    body = specimens_pg.app.test_client().get("/specimens").get_data(
+        as_text=True)
+    estimate = int(re.search(r"about (\d+) in total", body).group(1))
+    assert abs(estimate - count) <= count * 0.1
+
+
+@pytest.mark.benchmark
+def test_benchmark_partition_pruning(specimens_pg, sightings):
+    count, names = sightings
+    year = date.today().year - 2
+    url = "/specimens?stream=1&since={0}-03-01&until={0}-04-01".format(year)
+    response, executed = captured_request(specimens_pg, url)
+    assert response.status_code == 200
+    statement, parameters = next(
+        captured for captured in executed if "sightingdate >=" in captured[0])
+
+    def best_of(conn, runs=3):
+        plans = [plan(conn, statement, parameters, analyze=True)
+                 for _ in range(runs)]
+        return min(plans, key=lambda root: root["Actual Total Time"])
+
+    with engine_of(specimens_pg).connect() as conn:
+        pruned = best_of(conn)
+        conn.execute(text("SET enable_partition_pruning = off"))
+        unpruned = best_of(conn)
+        conn.rollback()
+
+    def partitions_read(root):
+        return {
+            child["Relation Name"] for child in nodes(root)
+            if child.get("Relation Name", "").startswith("Specimen")}
+
+    report("one month of {} sightings in {} partitions".format(
+        count, len(names)),
+        pruned_ms=pruned["Actual Total Time"],
+        unpruned_ms=unpruned["Actual Total Time"],
+        pruned_partitions=len(partitions_read(pruned)),
+        unpruned_partitions=len(partitions_read(unpruned)))
+    assert partitions_read(pruned) == {"Specimen_y{}".format(year)}
+    assert partitions_read(unpruned) == set(names)
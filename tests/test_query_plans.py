@@ -0,0 +1,69 @@
+"""
+The hot routes must keep using indexes on Specimen and Show: every SELECT a
+route runs on seeded (and analyzed) data is EXPLAINed and must not contain
+a Seq Scan on either table.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from plans import captured_request, engine_of, seed, seq_scans
+
+pytestmark = pytest.mark.postgres
+
+
+@pytest.fixture(scope="module")
+def fyurr_seeded(fyurr_pg):
+    seed(engine_of(fyurr_pg), '''
+        TRUNCATE "UpcomingShow", "Show", "Venue", "Artist"
+            RESTART IDENTITY CASCADE;
+        INSERT INTO "Venue" (name, city, state, genres)
+        SELECT 'Venue ' || i, 'City ' || (i % 20), 'ST', '{Jazz}'
+        FROM generate_series(1, 500) i;
+        INSERT INTO "Artist" (name, city, state, genres)
+        SELECT 'Artist ' || i, 'City ' || (i % 20), 'ST', '{Jazz}'
+        FROM generate_series(1, 500) i;
+        -- years of past shows, a few weeks of upcoming ones
+        INSERT INTO "Show" (venue_id, artist_id, start_time)
+        SELECT i % 500 + 1, (i * 7) % 500 + 1,
+               now() - interval '1 hour' * (i - 2000)
+        FROM generate_series(1, 50000) i;
+    ''')
+    return fyurr_pg
+
+
+@pytest.fixture(scope="module")
+def specimens_seeded(specimens_pg):
+    seed(engine_of(specimens_pg), '''
+        TRUNCATE "Specimen", "Animal", "Institution"
+            RESTART IDENTITY CASCADE;
+        INSERT INTO "Animal" (genus, species)
+        SELECT 'Genus' || i, 'species' || i
+        FROM generate_series(1, 200) i;
+        INSERT INTO "Institution" (name)
+        SELECT 'Institution ' || i FROM generate_series(1, 50) i;
+        INSERT INTO "Specimen" (animal_id, institution_id, sightingdate)
+        SELECT i % 200 + 1, i % 50 + 1,
+               now() - interval '1 hour' * i
+        FROM generate_series(1, 50000) i;
+    ''')
+    return specimens_pg
+
+
+def route_seq_scans(module, url, tables):
+    response, executed = captured_request(module, url)
+    assert response.status_code == 200
+    assert executed
+    return seq_scans(engine_of(module), executed, tables)
+
+
+@pytest.mark.parametrize("url", ["/venues/42", "/artists/42", "/venues"])
+def test_fyurr_routes_use_show_indexes(fyurr_seeded, url):
+    fyurr_seeded.venues_cache.clear()
+    assert route_seq_scans(fyurr_seeded, url, ["Show"]) == []
+
+
+def test_specimens_route_uses_specimen_indexes(specimens_seeded):
+    since = (datetime.now() - timedelta(days=30)).date().isoformat()
+    for url in ["/specimens", "/specimens?after=25000",
+            "/specimens?since={}".format(since)]:
+        assert route_seq_scans(specimens_seeded, url, ["Specimen"]) == []
@@ -0,0 +1,59 @@
+from datetime import datetime
+
+from sqlalchemy import text
+
+
+def add_sighting(specimens, genus, species, institution):
+    db = specimens.db
+    animal = specimens.Animal(genus=genus, species=species)
+    place = specimens.Institution(name=institution)
+    db.session.add_all([animal, place])
+    db.session.flush()
+    db.session.add(specimens.Specimen(
+        animal_id=animal.id, institution_id=place.id,
+        sightingdate=datetime(2020, 5, 1)))
+    db.session.commit()
+
+
+def found(specimens, term):
+    results, _ = specimens.full_text_search(specimens.db.session, term)
+    return [(result["kind"], result["snippet"]) for result in results]
+
+
+def test_every_term_matches_as_a_prefix(specimens, specimens_db):
+    add_sighting(specimens, "Panthera", "leo", "Serengeti Station")
+    add_sighting(specimens, "Panthera", "pardus", "Kruger Park")
+
+    assert sorted(found(specimens, "panth leo")) == [
+        ("animal", "<mark>Panthera</mark> <mark>leo</mark>"),
+        ("specimen", "<mark>Panthera</mark> <mark>leo</mark>"),
+    ]
+    assert [kind for kind, _ in found(specimens, "kruger")] == [
+        "institution", "specimen"]
+    assert found(specimens, "  ") == []
+
+
+def test_results_are_paged(specimens, specimens_db):
+    for species in ("leo", "pardus", "onca"):
+        add_sighting(specimens, "Panthera", species, "Station")
+    session = specimens.db.session
+    first, has_next = specimens.full_text_search(
+        session, "panthera", per_page=4)
+    rest, has_more = specimens.full_text_search(
+        session, "panthera", page=2, per_page=4)
+    assert (len(first), has_next, len(rest), has_more) == (4, True, 2, False)
+
+
+def test_index_is_rebuilt_after_the_schema_is(specimens, specimens_db):
+    add_sighting(specimens, "Panthera", "leo", "Station")
+    assert found(specimens, "leo")
+
+    specimens_db.drop_all()
+    specimens_db.session.execute(text("DROP TABLE search_index"))
+    specimens_db.session.commit()
+    specimens_db.create_all()
+    add_sighting(specimens, "Ursus", "arctos", "Station")
+
+    assert found(specimens, "leo") == []
+    assert [kind for kind, _ in found(specimens, "ursus")] == [
+        "animal", "specimen"]
@@ -0,0 +1,59 @@
+"""
+search_animals' ILIKE '%term%' has to be served by the pg_trgm GIN indexes
+"""
+import hashlib
+
+import pytest
+
+from bench import report, scaled
+from plans import captured_request, engine_of, index_names, plan, seed
+
+pytestmark = pytest.mark.postgres
+
+TRGM_INDEXES = {"ix_Animal_genus_trgm", "ix_Animal_species_trgm"}
+
+
+@pytest.fixture(scope="module")
+def animals(specimens_pg):
+    count = scaled(20000)
+    seed(engine_of(specimens_pg), '''
+        TRUNCATE "Specimen", "Animal" RESTART IDENTITY CASCADE;
+        INSERT INTO "Animal" (genus, species)
+        SELECT 'G' || md5(i::text), 's' || md5((-i)::text)
+        FROM generate_series(1, {}) i;
+    '''.format(count))
+    return count
+
+
+def search_statement(module, term):
+    response, executed = captured_request(
+        module, "/animals/search", method="POST", data={"search_term": term})
+    assert response.status_code == 200
+    statement, parameters = next(
+        captured for captured in executed if "ILIKE" in captured[0].upper())
+    return statement, parameters
+
+
+def test_search_animals_uses_trigram_indexes(specimens_pg, animals):
+    term = hashlib.md5(b"1234").hexdigest()[4:10]
+    statement, parameters = search_statement(specimens_pg, term)
+    with engine_of(specimens_pg).connect() as conn:
+        root = plan(conn, statement, parameters)
+    assert TRGM_INDEXES <= index_names(root)
+
+
+@pytest.mark.benchmark
+def test_benchmark_trigram_search(specimens_pg, animals):
+    term = hashlib.md5(b"1234").hexdigest()[4:10]
+    statement, parameters = search_statement(specimens_pg, term)
+    with engine_of(specimens_pg).connect() as conn:
+        indexed = plan(conn, statement, parameters, analyze=True)
+        conn.exec_driver_sql("SET enable_bitmapscan = off")
+        conn.exec_driver_sql("SET enable_indexscan = off")
+        scanned = plan(conn, statement, parameters, analyze=True)
+        conn.rollback()
+    report("search_animals on {} animals".format(animals),
+           trigram_ms=indexed["Actual Total Time"],
+           seq_scan_ms=scanned["Actual Total Time"])
+    assert TRGM_INDEXES <= index_names(indexed)
+    assert indexed["Actual Total Time"] < scanned["Actual Total Time"]